@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import time
+
+from django.core.cache import cache
+
+
+VERSION_KEY = 'version:{name}'
+
+
+def get_version(name):
+    """
+    Return current version of cached data group. Versions start from
+    timestamp, so evicted version key never brings stale data back.
+    """
+    key = VERSION_KEY.format(name=name)
+    cache.add(key, int(time.time() * 1000), None)
+    return cache.get(key)
+
+
+def bump_version(name):
+    key = VERSION_KEY.format(name=name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
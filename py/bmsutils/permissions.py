@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from bmsutils.cache import bump_version, get_version
+from bmsutils.queryset import auth_branches
+from business.models import Branch
+
+
+AUTH_BRANCHES_KEY = 'bmsutils:auth_branches:{user_id}:{version}'
+AUTH_BRANCHES_TIMEOUT = 60 * 60 * 24
+
+
+def auth_branch_ids(user):
+    """
+    Return set of ids of branches user has access to. Memoized on user
+    object for the request and cached across requests until user's
+    branches membership or any branch changes.
+    """
+    if not hasattr(user, '_auth_branch_ids'):
+        key = AUTH_BRANCHES_KEY.format(
+            user_id=user.id,
+            version='{}.{}'.format(
+                get_version('branches'),
+                get_version('user_branches:{}'.format(user.id))
+            )
+        )
+        branch_ids = cache.get(key)
+        if branch_ids is None:
+            branch_ids = frozenset(
+                auth_branches(user).values_list('id', flat=True)
+            )
+            cache.set(key, branch_ids, AUTH_BRANCHES_TIMEOUT)
+        user._auth_branch_ids = branch_ids
+    return user._auth_branch_ids
+
+
+@receiver(post_save, sender=Branch)
+@receiver(post_delete, sender=Branch)
+def invalidate_all_auth_branches(sender, **kwargs):
+    bump_version('branches')
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_auth_branches(sender, instance, **kwargs):
+    bump_version('user_branches:{}'.format(instance.id))
+
+
+@receiver(m2m_changed, sender=User.branches.through)
+def invalidate_members_auth_branches(sender, instance, action, pk_set,
+                                     **kwargs):
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, User):
+        user_ids = [instance.id]
+    elif pk_set:
+        user_ids = pk_set
+    else:
+        # Branch members were cleared, their ids are unknown at this point
+        bump_version('branches')
+        return
+    for user_id in user_ids:
+        bump_version('user_branches:{}'.format(user_id))
@@ -2,14 +2,33 @@
 # -*- coding: utf-8 -*-
 
 from django.contrib import admin
-from cash_register.models import CashEntry, Category, DailyCashSet
+from cash_register.forms import CategoryChoiceField
+from cash_register.models import (
+    ArchivedCashEntry,
+    CashEntry,
+    Category,
+    DailyCashSet,
+)
+
+
+class CachedCategoryMixin(object):
+    """
+    Take category choices of cash entry forms from the categories cache
+    """
+
+    def formfield_for_foreignkey(self, db_field, request=None, **kwargs):
+        if db_field.name == 'category':
+            kwargs['form_class'] = CategoryChoiceField
+        return super(CachedCategoryMixin, self).formfield_for_foreignkey(
+            db_field, request, **kwargs
+        )
 
 
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'statement', 'is_deleted')
 
 
-class CashEntryAdmin(admin.ModelAdmin):
+class CashEntryAdmin(CachedCategoryMixin, admin.ModelAdmin):
     readonly_fields = ('price', 'set', 'statement')
     list_display = ('created_date', 'created_by')
 
@@ -17,18 +36,41 @@ class CashEntryAdmin(admin.ModelAdmin):
         return CashEntry.all_objects.all()
 
 
-class CashEntryInline(admin.StackedInline):
+class CashEntryInline(CachedCategoryMixin, admin.StackedInline):
     model = CashEntry
     extra = 1
     readonly_fields = ('confirmation_id',)
 
 
+class ArchivedCashEntryAdmin(admin.ModelAdmin):
+    list_display = ('created_date', 'created_by', 'is_deleted', 'archived_date')
+    list_filter = ('is_deleted',)
+
+    def get_readonly_fields(self, request, obj=None):
+        return [field.name for field in ArchivedCashEntry._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+class ArchivedCashEntryInline(admin.TabularInline):
+    model = ArchivedCashEntry
+    extra = 0
+    can_delete = False
+    fields = ('created_date', 'statement', 'category', 'price', 'is_deleted')
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+
 class DailyCashSetAdmin(admin.ModelAdmin):
-    list_display = ('date', 'branch', 'balance', 'is_locked')
+    list_display = ('date', 'branch', 'balance', 'is_locked', 'is_archived')
     list_filter = ("branch__name",)
-    inlines = [CashEntryInline]
+    inlines = [CashEntryInline, ArchivedCashEntryInline]
 
 
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(CashEntry, CashEntryAdmin)
 admin.site.register(DailyCashSet, DailyCashSetAdmin)
+admin.site.register(ArchivedCashEntry, ArchivedCashEntryAdmin)
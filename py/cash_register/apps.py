@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.apps import AppConfig
+
+
+class CashRegisterConfig(AppConfig):
+    name = 'cash_register'
+
+    def ready(self):
+        # Registers receivers invalidating cached user branches
+        from bmsutils import permissions  # noqa
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Min
+
+from cash_register.models import ArchivedCashEntry, CashEntry, DailyCashSet
+
+
+ARCHIVE_CHUNK_SIZE = 1000
+ARCHIVE_SETS_CHUNK_SIZE = 31
+
+
+def _archive_in_chunks(entries, chunk_size):
+    """
+    Move entries to the archive in separate transactions of `chunk_size`
+    rows, moved rows leave the queryset so it is re-queried every time
+    """
+    archived = 0
+    while True:
+        ids = list(entries.values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return archived
+        archived += ArchivedCashEntry.archive(
+            CashEntry.all_objects.filter(id__in=ids)
+        )
+
+
+def archive_deleted_entries(branch_ids=None, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """
+    Move soft deleted cash entries to the archive, returns their number
+    """
+    entries = CashEntry.all_objects.filter(is_deleted=True)
+    if branch_ids is not None:
+        entries = entries.filter(set__branch_id__in=branch_ids)
+    return _archive_in_chunks(entries, chunk_size)
+
+
+def get_archive_cutoffs(branch_ids=None, today=None):
+    """
+    Return first not archivable day by branch id. Year can be archived once
+    it has passed and all its days of the branch are locked.
+    """
+    this_year = date(today.year if today else date.today().year, 1, 1)
+    cash_sets = DailyCashSet.objects.all()
+    if branch_ids is not None:
+        cash_sets = cash_sets.filter(branch_id__in=branch_ids)
+
+    cutoffs = dict(
+        (branch_id, this_year) for branch_id in cash_sets.filter(
+            date__lt=this_year, is_archived=False
+        ).values_list('branch', flat=True).distinct().order_by()
+    )
+    first_unlocked = cash_sets.filter(is_locked=False).values_list(
+        'branch'
+    ).annotate(first_date=Min('date')).order_by()
+    for branch_id, first_date in first_unlocked:
+        if branch_id in cutoffs:
+            cutoffs[branch_id] = min(
+                cutoffs[branch_id], date(first_date.year, 1, 1)
+            )
+    return cutoffs
+
+
+def archive_closed_years(branch_ids=None, today=None,
+                         sets_chunk_size=ARCHIVE_SETS_CHUNK_SIZE):
+    """
+    Move all entries of closed years to the archive and mark their days
+    as archived, returns number of archived entries. Days are archived
+    in chunks, each of them locked for the time its entries are moved.
+    Days locked before totals were frozen get their snapshot first.
+    Active KP/KW confirmations stay in the hot table, where confirmation
+    documents are rendered from. Days are read whole through CashEntryRecord.
+    """
+    archived = 0
+    for branch_id, cutoff in get_archive_cutoffs(branch_ids, today).items():
+        set_ids = list(DailyCashSet.objects.filter(
+            branch_id=branch_id, date__lt=cutoff, is_archived=False
+        ).order_by('date').values_list('id', flat=True))
+
+        for start in range(0, len(set_ids), sets_chunk_size):
+            with transaction.atomic():
+                locked_ids = list(DailyCashSet.objects.select_for_update(
+                ).filter(
+                    id__in=set_ids[start:start + sets_chunk_size],
+                    is_locked=True,
+                    is_archived=False
+                ).values_list('id', flat=True))
+                DailyCashSet.freeze_totals(list(DailyCashSet.objects.filter(
+                    id__in=locked_ids, closing_balance__isnull=True
+                ).values_list('id', 'balance')))
+                archived += ArchivedCashEntry.archive(
+                    CashEntry.all_objects.filter(set_id__in=locked_ids).exclude(
+                        confirmation=True, is_deleted=False
+                    )
+                )
+                DailyCashSet.objects.filter(id__in=locked_ids).update(
+                    is_archived=True
+                )
+    return archived
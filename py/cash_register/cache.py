@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from bmsutils.cache import bump_version, get_version
+
+
+SUMMARY_KEY = 'cash_register:summary:{year}:{month}:{statement}:{version}'
+SUMMARY_TIMEOUT = 60 * 60 * 24
+REGISTER_STATE_KEY = 'cash_register:state:{branch_id}'
+REGISTER_STATE_TIMEOUT = 60 * 60 * 24
+BRANCH_DATES_KEY = 'cash_register:dates:{branch_id}'
+CHANGED_KEY = 'cash_register:changed:{name}'
+PAGE_KEY = (
+    'cash_register:page:{set_id}:{user_id}:{visibility}:{csrf_token}:'
+    '{changed}:{today}'
+)
+PAGE_TIMEOUT = 60 * 60 * 24
+
+
+def _normalize_period(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value or None
+
+
+def get_summary_key(year=None, month=None, statement=None):
+    year, month = _normalize_period(year), _normalize_period(month)
+    version = '{}.{}'.format(
+        get_version('categories'),
+        get_version('summary:{}:{}'.format(year, month))
+    )
+    return SUMMARY_KEY.format(
+        year=year,
+        month=month,
+        statement=statement or None,
+        version=version,
+    )
+
+
+def invalidate_summaries(day):
+    """
+    Invalidate category summaries of every period containing given day
+    """
+    for year, month in ((day.year, day.month), (day.year, None),
+                        (None, day.month), (None, None)):
+        bump_version('summary:{}:{}'.format(year, month))
+
+
+def invalidate_categories():
+    bump_version('categories')
+
+
+def get_register_state(branch_id):
+    return cache.get(REGISTER_STATE_KEY.format(branch_id=branch_id))
+
+
+def set_register_state(branch_id, state):
+    cache.set(
+        REGISTER_STATE_KEY.format(branch_id=branch_id),
+        state,
+        REGISTER_STATE_TIMEOUT
+    )
+
+
+def get_branch_dates(branch_id):
+    return cache.get(BRANCH_DATES_KEY.format(branch_id=branch_id))
+
+
+def set_branch_dates(branch_id, dates):
+    cache.set(
+        BRANCH_DATES_KEY.format(branch_id=branch_id),
+        dates,
+        REGISTER_STATE_TIMEOUT
+    )
+
+
+def invalidate_register_state(branch_id):
+    invalidate_register_states([branch_id])
+
+
+def invalidate_register_states(branch_ids):
+    """
+    Invalidate register state and dates list of given branches. Keys are
+    deleted again once the current transaction commits, so a state cached
+    by concurrent request from not yet committed data doesn't survive.
+    """
+    keys = []
+    for branch_id in branch_ids:
+        keys.append(REGISTER_STATE_KEY.format(branch_id=branch_id))
+        keys.append(BRANCH_DATES_KEY.format(branch_id=branch_id))
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_changed(name):
+    """
+    Return time of the last change of data group, evicted time is
+    replaced with current one which only makes clients refetch the data
+    """
+    key = CHANGED_KEY.format(name=name)
+    cache.add(key, time.time(), None)
+    return cache.get(key)
+
+
+def touch(name):
+    """
+    Mark data group as changed now and again when the current transaction
+    commits, validators computed before the commit get outdated then
+    """
+    key = CHANGED_KEY.format(name=name)
+    cache.set(key, time.time(), None)
+    transaction.on_commit(lambda: cache.set(key, time.time(), None))
+
+
+def cash_set_name(branch_id, day):
+    return 'set:{}:{}'.format(branch_id, day)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from bmsutils.cache import get_version
+from cash_register.models import Category
+
+
+# Active categories of this process with version they were loaded in
+_categories = {
+    'version': None,
+    'categories': (),
+}
+
+
+def get_categories(statement=None):
+    """
+    Return active cash categories, optionally of given statement. They are
+    loaded once per process and reloaded only when categories version,
+    bumped on every category change, differs from the loaded one.
+    """
+    version = get_version('categories')
+    if _categories['version'] != version:
+        _categories['categories'] = tuple(Category.objects.all())
+        _categories['version'] = version
+
+    return [
+        category for category in _categories['categories']
+        if statement is None or category.statement == statement
+    ]
+
+
+def get_category(category_id, statement=None):
+    for category in get_categories(statement):
+        if category.id == category_id:
+            return category
+    return None
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+
+def make_etag(*parts):
+    return hashlib.md5(
+        '|'.join('{}'.format(part) for part in parts).encode('utf-8')
+    ).hexdigest()
+
+
+def get_not_modified_response(request, etag, last_modified):
+    """
+    Return 304 response when client already has current version of the
+    resource, None otherwise. If-None-Match takes precedence.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        etags = [value.strip() for value in if_none_match.split(',')]
+        if quote_etag(etag) not in etags and '*' not in etags:
+            return None
+    else:
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+        )
+        if if_modified_since is None or \
+                int(last_modified) > if_modified_since:
+            return None
+
+    response = HttpResponseNotModified()
+    set_conditional_headers(response, etag, last_modified)
+    return response
+
+
+def set_conditional_headers(response, etag, last_modified):
+    response['ETag'] = quote_etag(etag)
+    response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from tempfile import SpooledTemporaryFile
+
+from django.http import HttpRequest
+
+from reports.cash_reports import CashRegisterConfirmationPDF
+
+try:
+    from PyPDF2 import PdfFileMerger
+except ImportError:
+    PdfFileMerger = None
+
+
+# Merged document is kept in memory up to this size, then on disk
+SPOOL_MAX_SIZE = 10 * 1024 * 1024
+
+
+def render_confirmation(entry_id, user):
+    """
+    Render single KP/KW confirmation, returns PDF content or None when
+    confirmation can't be rendered
+    """
+    request = HttpRequest()
+    request.method = 'GET'
+    request.user = user
+    response = CashRegisterConfirmationPDF.as_view()(
+        request, entry_id=str(entry_id)
+    )
+    if response.status_code != 200:
+        return None
+    return response.content
+
+
+def render_confirmations(entry_ids, user):
+    """
+    Render confirmations of given entries one by one and merge them into
+    one multi-page PDF, returns file object positioned at start. Rendering
+    is CPU bound, so it isn't spread over threads.
+    """
+    if PdfFileMerger is None:
+        raise RuntimeError('PyPDF2 is required to merge confirmations')
+
+    merger = PdfFileMerger()
+    for entry_id in entry_ids:
+        content = render_confirmation(entry_id, user)
+        if content is None:
+            continue
+        page = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        page.write(content)
+        page.seek(0)
+        merger.append(page)
+
+    output = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    merger.write(output)
+    merger.close()
+    output.seek(0)
+    return output
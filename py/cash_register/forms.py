@@ -7,9 +7,54 @@ from django.utils.translation import ugettext as _
 
 from bmsutils.forms import UserFullnameChoiceField, ThemedModelForm
 
+from cash_register.categories import get_categories, get_category
 from cash_register.models import CashEntry, Category
 
 
+class CategoryChoiceField(forms.ModelChoiceField):
+    """
+    Category choice field which takes choices and validates values
+    with cached categories instead of querying the database
+    """
+
+    def __init__(self, statement=None, *args, **kwargs):
+        self.statement = statement
+        queryset = Category.objects.all()
+        if statement:
+            queryset = queryset.filter(statement=statement)
+        kwargs.setdefault('queryset', queryset)
+        super(CategoryChoiceField, self).__init__(*args, **kwargs)
+
+    def _get_choices(self):
+        if hasattr(self, '_choices'):
+            return self._choices
+
+        choices = []
+        if self.empty_label is not None:
+            choices.append(('', self.empty_label))
+        choices.extend(
+            (category.pk, self.label_from_instance(category))
+            for category in get_categories(self.statement)
+        )
+        return choices
+
+    choices = property(_get_choices, forms.ChoiceField._set_choices)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            category = get_category(int(value), self.statement)
+        except (TypeError, ValueError):
+            category = None
+        if category is None:
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice'
+            )
+        return category
+
+
 class CashRegisterForm(ThemedModelForm):
     disabled_fields = ['branch', 'statement']
     auth_users = 'created_by'
@@ -36,6 +81,16 @@ class CashRegisterForm(ThemedModelForm):
             )
         return price
 
+    def _use_cached_categories(self, statement):
+        field = self.fields['category']
+        self.fields['category'] = CategoryChoiceField(
+            statement,
+            label=field.label,
+            required=field.required,
+            widget=field.widget,
+            help_text=field.help_text,
+        )
+
     class Meta:
         model = CashEntry
         fields = [
@@ -67,17 +122,13 @@ class CashRegisterForm(ThemedModelForm):
 class IncomeForm(CashRegisterForm):
     def __init__(self, *arg, **kwargs):
         super(IncomeForm, self).__init__(*arg, **kwargs)
-        self.fields['category'].queryset = Category.objects.filter(
-            statement='income'
-        )
+        self._use_cached_categories('income')
 
 
 class ExpenseForm(CashRegisterForm):
     def __init__(self, *arg, **kwargs):
         super(ExpenseForm, self).__init__(*arg, **kwargs)
-        self.fields['category'].queryset = Category.objects.filter(
-            statement='expense'
-        )
+        self._use_cached_categories('expense')
 
 
 class CashEntryUpdateForm(CashRegisterForm):
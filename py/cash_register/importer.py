@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from collections import defaultdict
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils.dateparse import parse_date
+from django.utils.translation import ugettext as _
+
+from bmsutils.permissions import auth_branch_ids
+from business.models import Branch
+from cash_register.cache import cash_set_name, invalidate_summaries, touch
+from cash_register.forms import ExpenseForm, IncomeForm
+from cash_register.models import CashEntry, CategoryRollup, DailyCashSet
+
+
+ENTRY_FORMS = {
+    'income': IncomeForm,
+    'expense': ExpenseForm,
+}
+
+
+def _is_day_forbidden(state, day, cash_set_locked):
+    """
+    Return True when day can't get new entries, with the same rules as
+    cash register views. `cash_set_locked` is None when day has no set.
+    """
+    if cash_set_locked:
+        return True
+    earliest, latest = state
+    if earliest is None or latest is None:
+        return False
+    return (
+        day < earliest.date or
+        (day > latest.date and not latest.is_locked) or
+        (day < latest.date and cash_set_locked is None)
+    )
+
+
+def _validate(entries_data, user):
+    """
+    Validate entries with cash register form rules, returns list of
+    ((branch_id, date), unsaved entry) pairs and dict of errors by index
+    """
+    entries, errors = [], {}
+    allowed_branch_ids = auth_branch_ids(user)
+    keys = {}
+    for index, data in enumerate(entries_data):
+        if not isinstance(data, dict):
+            errors[index] = {
+                'non_field_errors': [_(u'Oczekiwano obiektu wpisu.')]
+            }
+            continue
+        try:
+            day = parse_date(data.get('date') or '')
+        except (TypeError, ValueError):
+            day = None
+        branch = str(data.get('branch', ''))
+        if day is not None and branch.isdigit():
+            keys[index] = (int(branch), day)
+
+    branch_ids = set(Branch.objects.values_list('id', flat=True).filter(
+        id__in={branch_id for branch_id, __ in keys.values()}
+    ))
+    states = {
+        branch_id: DailyCashSet.get_register_state(branch_id)
+        for branch_id in branch_ids & allowed_branch_ids
+    }
+    locked_flags = {
+        (branch_id, day): is_locked
+        for branch_id, day, is_locked in DailyCashSet.objects.filter(
+            branch_id__in=states,
+            date__in={day for __, day in keys.values()}
+        ).values_list('branch', 'date', 'is_locked')
+    }
+
+    for index, data in enumerate(entries_data):
+        if index in errors:
+            continue
+        form_class = ENTRY_FORMS.get(data.get('statement'))
+        if form_class is None:
+            errors[index] = {'statement': [_(u'Nieznana operacja.')]}
+            continue
+        if index not in keys or keys[index][0] not in branch_ids:
+            errors[index] = {'date': [_(u'Podaj oddział i datę.')]}
+            continue
+        branch_id, day = keys[index]
+        if branch_id not in allowed_branch_ids:
+            errors[index] = {'branch': [_(u'Brak dostępu do oddziału.')]}
+            continue
+        if _is_day_forbidden(
+                states[branch_id], day, locked_flags.get((branch_id, day))):
+            errors[index] = {'date': [_(u'Nie można dodać wpisu w tym dniu.')]}
+            continue
+
+        form = form_class(
+            data=data,
+            initial={'statement': data['statement']},
+            user=user
+        )
+        if not form.is_valid():
+            errors[index] = form.errors
+            continue
+        entries.append((keys[index], form.save(commit=False)))
+    return entries, errors
+
+
+def _get_cash_sets(keys):
+    """
+    Return cash sets of given (branch_id, date) keys together with all later
+    sets of their branches, locked for update. Missing sets are created in
+    date order, each one opened with balance of the set before it.
+    """
+    first_days = {}
+    for branch_id, day in keys:
+        first_days[branch_id] = min(day, first_days.get(branch_id, day))
+
+    cash_sets = {}
+    for branch_id, first_day in sorted(first_days.items()):
+        existing = DailyCashSet.objects.select_for_update().filter(
+            branch_id=branch_id,
+            date__gte=first_day
+        ).order_by('date')
+        for cash_set in existing:
+            cash_sets[(cash_set.branch_id, cash_set.date)] = cash_set
+
+    for branch_id, day in sorted(keys - set(cash_sets)):
+        previous = DailyCashSet.objects.filter(
+            branch_id=branch_id, date__lt=day
+        ).order_by('date').last()
+        cash_set = DailyCashSet(
+            branch_id=branch_id,
+            date=day,
+            balance=previous.balance if previous is not None else 0
+        )
+        cash_set.save()
+        cash_sets[(branch_id, day)] = cash_set
+    return cash_sets
+
+
+def _apply_deltas(cash_sets, deltas):
+    """
+    Add delta of every imported day to balance of that day and all later
+    days of the branch, so the balance chain stays continuous. Given cash
+    sets hold all these days and get their new balances.
+    """
+    for (branch_id, day), delta in sorted(deltas.items()):
+        DailyCashSet.objects.filter(
+            branch_id=branch_id, date__gte=day
+        ).update(balance=F('balance') + delta)
+
+    balances = dict(DailyCashSet.objects.filter(
+        id__in=[cash_set.id for cash_set in cash_sets.values()]
+    ).values_list('id', 'balance'))
+    for (branch_id, day), cash_set in cash_sets.items():
+        cash_set.balance = balances[cash_set.id]
+        touch(cash_set_name(branch_id, day))
+
+
+def import_entries(entries_data, user):
+    """
+    Import list of income and expense entries at once. Nothing is imported
+    when any entry is invalid or would change a locked day, including days
+    after the imported one. Returns imported entries and errors by index.
+    """
+    entries, errors = _validate(entries_data, user)
+    if errors:
+        return [], errors
+
+    keys = {key for key, __ in entries}
+    with transaction.atomic():
+        cash_sets = _get_cash_sets(keys)
+        # Balances of all later days change too, so none of them can be locked
+        locked = {key for key, cash_set in cash_sets.items()
+                  if cash_set.is_locked}
+        for index, ((branch_id, day), __) in enumerate(entries):
+            if any(branch_id == locked_branch_id and day <= locked_day
+                   for locked_branch_id, locked_day in locked):
+                errors[index] = {'date': [_(u'Raport kasowy jest zamknięty.')]}
+        if errors:
+            transaction.set_rollback(True)
+            return [], errors
+
+        now = datetime.now(settings.LOCAL_TZ)
+        deltas = defaultdict(int)
+        rollups = defaultdict(lambda: [0, 0])
+        for key, entry in entries:
+            entry.set = cash_sets[key]
+            # Imported entry belongs to its day, also for confirmation year
+            entry.created_date = now.replace(
+                year=key[1].year, month=key[1].month, day=key[1].day
+            )
+            deltas[key] += entry.price
+            rollup = rollups[(key, entry.category_id, entry.statement)]
+            rollup[0] += entry.price
+            rollup[1] += 1
+
+        new_entries = [entry for __, entry in entries]
+        CashEntry.set_confirmation_ids(new_entries)
+        CashEntry.objects.bulk_create(new_entries)
+
+        _apply_deltas(cash_sets, deltas)
+        for (key, category_id, statement), (value, count) in rollups.items():
+            CategoryRollup.add(
+                cash_sets[key], category_id, statement, value, count
+            )
+
+    for day in {day for __, day in keys}:
+        invalidate_summaries(day)
+    touch('entries')
+    return new_entries, {}
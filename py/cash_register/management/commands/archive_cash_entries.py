@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+
+from cash_register.archive import archive_closed_years, archive_deleted_entries
+
+
+class Command(BaseCommand):
+    help = (
+        'Move soft deleted cash entries and entries of closed years '
+        'to the archive table'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--branch', type=int, action='append', dest='branches',
+            help='Archive entries only of given branch id, can be repeated'
+        )
+        parser.add_argument(
+            '--deleted-only', action='store_true', default=False,
+            help='Archive only soft deleted entries'
+        )
+
+    def handle(self, *args, **options):
+        deleted = archive_deleted_entries(branch_ids=options['branches'])
+        self.stdout.write('Archived {} deleted cash entries'.format(deleted))
+
+        if not options['deleted_only']:
+            closed = archive_closed_years(branch_ids=options['branches'])
+            self.stdout.write(
+                'Archived {} cash entries of closed years'.format(closed)
+            )
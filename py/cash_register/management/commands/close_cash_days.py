@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from cash_register.models import DailyCashSet
+
+
+class Command(BaseCommand):
+    help = 'Close cash register days of all branches at once'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date', help='First day to close as YYYY-MM-DD, today by default'
+        )
+        parser.add_argument(
+            '--date-to', help='Last day to close as YYYY-MM-DD'
+        )
+        parser.add_argument(
+            '--branch', type=int, action='append', dest='branches',
+            help='Close days only of given branch id, can be repeated'
+        )
+
+    def _parse_date(self, value):
+        day = parse_date(value)
+        if day is None:
+            raise CommandError('Invalid date {}'.format(value))
+        return day
+
+    def handle(self, *args, **options):
+        date_from = date.today()
+        if options['date']:
+            date_from = self._parse_date(options['date'])
+        date_to = date_from
+        if options['date_to']:
+            date_to = self._parse_date(options['date_to'])
+
+        cash_sets = DailyCashSet.objects.filter(
+            date__gte=date_from,
+            date__lte=date_to
+        )
+        if options['branches']:
+            cash_sets = cash_sets.filter(branch_id__in=options['branches'])
+
+        closed = DailyCashSet.close(cash_sets)
+        self.stdout.write('Closed {} cash sets'.format(closed))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Compare two cash register benchmark results files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('baseline', help='Results of previous run')
+        parser.add_argument('current', help='Results of current run')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Allowed relative wall time growth, 0.2 by default'
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Exit with error when any scenario regressed'
+        )
+
+    def _load(self, path):
+        try:
+            with open(path) as results_file:
+                return json.load(results_file)
+        except (IOError, ValueError) as e:
+            raise CommandError('Cannot read {}: {}'.format(path, e))
+
+    def handle(self, *args, **options):
+        baseline = self._load(options['baseline'])
+        current = self._load(options['current'])
+        regressions = []
+
+        row = '{:<22} {:>8} {:>8} {:>10} {:>10} {:>8}  {}'
+        self.stdout.write(row.format(
+            'scenario', 'queries', 'before', 'seconds', 'before', 'change', ''
+        ))
+        for name in sorted(set(baseline) | set(current)):
+            if name not in baseline or name not in current:
+                self.stdout.write('{:<22} only in one run'.format(name))
+                continue
+
+            old, new = baseline[name], current[name]
+            change = (
+                (new['seconds'] - old['seconds']) / old['seconds']
+                if old['seconds'] else 0
+            )
+            regressed = (
+                new['queries'] > old['queries'] or
+                change > options['tolerance']
+            )
+            if regressed:
+                regressions.append(name)
+
+            self.stdout.write(row.format(
+                name,
+                new['queries'],
+                old['queries'],
+                '{:.4f}'.format(new['seconds']),
+                '{:.4f}'.format(old['seconds']),
+                '{:+.0%}'.format(change),
+                'REGRESSION' if regressed else '',
+            ))
+
+        if regressions and options['fail_on_regression']:
+            raise CommandError(
+                'Regressed scenarios: {}'.format(', '.join(regressions))
+            )
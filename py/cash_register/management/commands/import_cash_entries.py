@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from cash_register.importer import import_entries
+
+
+class Command(BaseCommand):
+    help = 'Import list of cash entries from JSON file in one transaction'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSON file with list of entries')
+        parser.add_argument(
+            '--user', required=True,
+            help='Username of user importing entries'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError('User {} does not exist'.format(options['user']))
+
+        with open(options['path']) as entries_file:
+            entries_data = json.load(entries_file)
+
+        entries, errors = import_entries(entries_data, user)
+        if errors:
+            raise CommandError('\n'.join(
+                'Entry {}: {}'.format(index, json.dumps(entry_errors))
+                for index, entry_errors in sorted(errors.items())
+            ))
+        self.stdout.write('Imported {} cash entries'.format(len(entries)))
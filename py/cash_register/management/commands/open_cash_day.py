@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from cash_register.models import DailyCashSet
+
+
+class Command(BaseCommand):
+    help = 'Open cash register day for all branches at once'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date', help='Day to open as YYYY-MM-DD, today by default'
+        )
+        parser.add_argument(
+            '--branch', type=int, action='append', dest='branches',
+            help='Open day only for given branch id, can be repeated'
+        )
+
+    def handle(self, *args, **options):
+        day = date.today()
+        if options['date']:
+            day = parse_date(options['date'])
+            if day is None:
+                raise CommandError('Invalid date {}'.format(options['date']))
+
+        cash_sets, skipped = DailyCashSet.open_day(day, options['branches'])
+        self.stdout.write('Opened {} for {} branches'.format(day, len(cash_sets)))
+        if skipped:
+            self.stdout.write(
+                'Skipped branches with unlocked latest day: {}'.format(
+                    ', '.join(str(branch_id) for branch_id in skipped)
+                )
+            )
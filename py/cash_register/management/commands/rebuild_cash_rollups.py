@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+
+from cash_register.cache import invalidate_categories
+from cash_register.models import CategoryRollup
+
+
+class Command(BaseCommand):
+    help = 'Recompute monthly cash category rollups from cash entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--branch', type=int, action='append', dest='branches',
+            help='Rebuild only given branch id, can be repeated'
+        )
+
+    def handle(self, *args, **options):
+        count = CategoryRollup.rebuild(branch_ids=options['branches'])
+        # Categories version is a part of every summary cache key
+        invalidate_categories()
+        self.stdout.write('Rebuilt {} cash category rollups'.format(count))
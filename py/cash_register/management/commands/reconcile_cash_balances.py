@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+
+from cash_register.reconciliation import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recompute cash sets balances from entries and report differences'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--branch', type=int, action='append', dest='branches',
+            help='Reconcile only given branch id, can be repeated'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Number of worker processes, 4 by default'
+        )
+        parser.add_argument(
+            '--repair', action='store_true',
+            help='Store recomputed balances'
+        )
+
+    def handle(self, *args, **options):
+        differences = reconcile(
+            branch_ids=options['branches'],
+            workers=options['workers'],
+            fix=options['repair']
+        )
+        for difference in differences:
+            self.stdout.write(
+                'Branch {0.branch_id} {0.date}: stored {0.stored}, '
+                'expected {0.expected}'.format(difference)
+            )
+        self.stdout.write('{} {} cash sets'.format(
+            'Repaired' if options['repair'] else 'Found',
+            len(differences)
+        ))
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def parse_confirmation_id(confirmation_id, created_date):
+    """
+    Return (year, number) of confirmation id like KP/15/0001, or None when
+    id is malformed. Century is taken from the entry creation date, the
+    closest one wins, so entries created around New Year in UTC get the
+    year their number was given in.
+    """
+    parts = confirmation_id.split('/')
+    if len(parts) != 3 or not parts[1].isdigit() or not parts[2].isdigit():
+        return None
+    short_year = int(parts[1])
+    century = created_date.year - created_date.year % 100
+    year = min(
+        (century + offset + short_year for offset in (-100, 0, 100)),
+        key=lambda year: abs(year - created_date.year)
+    )
+    return year, int(parts[2])
+
+
+def seed_counters(apps, schema_editor):
+    CashEntry = apps.get_model('cash_register', 'CashEntry')
+    ConfirmationCounter = apps.get_model('cash_register', 'ConfirmationCounter')
+
+    last_numbers = {}
+    entries = CashEntry.objects.filter(confirmation=True).exclude(
+        confirmation_id=''
+    ).values_list(
+        'set__branch', 'statement', 'created_date', 'confirmation_id'
+    )
+    for branch_id, statement, created_date, confirmation_id in entries.iterator():
+        parsed = parse_confirmation_id(confirmation_id, created_date)
+        if parsed is None:
+            continue
+        year, number = parsed
+        key = (branch_id, statement, year)
+        last_numbers[key] = max(number, last_numbers.get(key, 0))
+
+    ConfirmationCounter.objects.bulk_create([
+        ConfirmationCounter(
+            branch_id=branch_id,
+            statement=statement,
+            year=year,
+            last_number=last_number
+        )
+        for (branch_id, statement, year), last_number in last_numbers.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0001_initial'),
+        ('cash_register', '0003_auto_20170425_0013'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConfirmationCounter',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('statement', models.CharField(max_length=8, choices=[('income', 'Wpłata'), ('expense', 'Wypłata')])),
+                ('year', models.PositiveSmallIntegerField()),
+                ('last_number', models.PositiveIntegerField(default=0)),
+                ('branch', models.ForeignKey(to='business.Branch')),
+            ],
+            options={
+                'default_permissions': (),
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='confirmationcounter',
+            unique_together=set([('branch', 'statement', 'year')]),
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def build_rollups(apps, schema_editor):
+    CashEntry = apps.get_model('cash_register', 'CashEntry')
+    CategoryRollup = apps.get_model('cash_register', 'CategoryRollup')
+
+    totals = defaultdict(lambda: [0, 0])
+    daily_totals = CashEntry.objects.filter(is_deleted=False).values_list(
+        'set__branch', 'category', 'statement', 'set__date'
+    ).annotate(
+        summary_value=Sum('price'),
+        entries_count=Count('id')
+    ).order_by()
+    for branch_id, category_id, statement, day, value, count in daily_totals:
+        key = (branch_id, category_id, statement, day.year, day.month)
+        totals[key][0] += value
+        totals[key][1] += count
+
+    CategoryRollup.objects.bulk_create([
+        CategoryRollup(
+            branch_id=branch_id,
+            category_id=category_id,
+            statement=statement,
+            year=year,
+            month=month,
+            summary_value=value,
+            entries_count=count
+        )
+        for (branch_id, category_id, statement, year, month), (value, count)
+        in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0001_initial'),
+        ('cash_register', '0004_confirmationcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryRollup',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('statement', models.CharField(max_length=8, choices=[('income', 'Wpłata'), ('expense', 'Wypłata')])),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('summary_value', models.DecimalField(default=0, max_digits=12, decimal_places=2)),
+                ('entries_count', models.IntegerField(default=0)),
+                ('branch', models.ForeignKey(to='business.Branch')),
+                ('category', models.ForeignKey(to='cash_register.Category')),
+            ],
+            options={
+                'default_permissions': (),
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='categoryrollup',
+            unique_together=set([('branch', 'category', 'statement', 'year', 'month')]),
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def check_duplicated_sets(apps, schema_editor):
+    DailyCashSet = apps.get_model('cash_register', 'DailyCashSet')
+    duplicates = DailyCashSet.objects.values('branch', 'date').annotate(
+        sets_count=Count('id')
+    ).filter(sets_count__gt=1).order_by()
+    if duplicates:
+        raise RuntimeError(
+            'Merge duplicated cash sets before migrating: {}'.format(
+                ', '.join(
+                    '{branch}/{date}'.format(**duplicate)
+                    for duplicate in duplicates
+                )
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cash_register', '0005_categoryrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicated_sets, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='dailycashset',
+            unique_together=set([('branch', 'date')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='cashentry',
+            index_together=set([('set', 'created_date')]),
+        ),
+    ]
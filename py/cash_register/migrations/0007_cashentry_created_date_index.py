@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cash_register', '0006_cash_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='cashentry',
+            index_together=set([('set', 'created_date'), ('created_date', 'id')]),
+        ),
+    ]
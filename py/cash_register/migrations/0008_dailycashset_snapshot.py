@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cash_register', '0007_cashentry_created_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailycashset',
+            name='opening_balance',
+            field=models.DecimalField(max_digits=10, decimal_places=2, null=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='dailycashset',
+            name='income_total',
+            field=models.DecimalField(max_digits=10, decimal_places=2, null=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='dailycashset',
+            name='expense_total',
+            field=models.DecimalField(max_digits=10, decimal_places=2, null=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='dailycashset',
+            name='entries_count',
+            field=models.PositiveIntegerField(null=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='dailycashset',
+            name='closing_balance',
+            field=models.DecimalField(max_digits=10, decimal_places=2, null=True, editable=False),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('cash_register', '0008_dailycashset_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailycashset',
+            name='is_archived',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ArchivedCashEntry',
+            fields=[
+                ('id', models.IntegerField(serialize=False, primary_key=True)),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('created_date', models.DateTimeField()),
+                ('statement', models.CharField(max_length=8, choices=[(b'income', 'Wp\u0142ata'), (b'expense', 'Wyp\u0142ata')])),
+                ('price', models.DecimalField(default=0.0, max_digits=8, decimal_places=2)),
+                ('document_refer', models.CharField(max_length=128, blank=True)),
+                ('person_refer', models.CharField(max_length=256, blank=True)),
+                ('note', models.TextField(blank=True)),
+                ('confirmation', models.BooleanField(default=False)),
+                ('confirmation_id', models.CharField(max_length=16, blank=True)),
+                ('archived_date', models.DateTimeField(auto_now_add=True)),
+                ('category', models.ForeignKey(related_name='+', to='cash_register.Category')),
+                ('created_by', models.ForeignKey(related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('set', models.ForeignKey(related_name='archived_entries', to='cash_register.DailyCashSet')),
+            ],
+            options={
+                'ordering': ('created_date',),
+                'default_permissions': (),
+                'verbose_name_plural': 'Archived cash entries',
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+ENTRY_COLUMNS = (
+    'id, is_deleted, {is_archived} AS is_archived, set_id, created_by_id, '
+    'created_date, statement, category_id, price, document_refer, '
+    'person_refer, note, confirmation, confirmation_id'
+)
+
+CREATE_VIEW_SQL = (
+    'CREATE VIEW cash_register_cashentryrecord AS '
+    'SELECT {hot} FROM cash_register_cashentry '
+    'UNION ALL '
+    'SELECT {archived} FROM cash_register_archivedcashentry'
+).format(
+    hot=ENTRY_COLUMNS.format(is_archived='1 = 0'),
+    archived=ENTRY_COLUMNS.format(is_archived='1 = 1'),
+)
+
+DROP_VIEW_SQL = 'DROP VIEW cash_register_cashentryrecord'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('cash_register', '0009_archivedcashentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CashEntryRecord',
+            fields=[
+                ('id', models.IntegerField(serialize=False, primary_key=True)),
+                ('is_deleted', models.BooleanField(default=False)),
+                ('is_archived', models.BooleanField(default=False)),
+                ('created_date', models.DateTimeField()),
+                ('statement', models.CharField(max_length=8, choices=[(b'income', 'Wp\u0142ata'), (b'expense', 'Wyp\u0142ata')])),
+                ('price', models.DecimalField(default=0.0, max_digits=8, decimal_places=2)),
+                ('document_refer', models.CharField(max_length=128, blank=True)),
+                ('person_refer', models.CharField(max_length=256, blank=True)),
+                ('note', models.TextField(blank=True)),
+                ('confirmation', models.BooleanField(default=False)),
+                ('confirmation_id', models.CharField(max_length=16, blank=True)),
+                ('category', models.ForeignKey(related_name='+', on_delete=django.db.models.deletion.DO_NOTHING, to='cash_register.Category')),
+                ('created_by', models.ForeignKey(related_name='+', on_delete=django.db.models.deletion.DO_NOTHING, to=settings.AUTH_USER_MODEL)),
+                ('set', models.ForeignKey(related_name='+', on_delete=django.db.models.deletion.DO_NOTHING, to='cash_register.DailyCashSet')),
+            ],
+            options={
+                'ordering': ('created_date', 'id'),
+                'managed': False,
+                'default_permissions': (),
+            },
+        ),
+        migrations.RunSQL(CREATE_VIEW_SQL, DROP_VIEW_SQL),
+    ]
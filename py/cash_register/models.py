@@ -1,15 +1,34 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from datetime import datetime
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+from datetime import date, datetime
 
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, Count, F, Sum, Value, When
 from django.utils.translation import ugettext as _
 from django.conf import settings
 
 from bmsutils.models import SoftDeleteModel
 from business.models import Branch
+from cash_register.cache import (
+    cash_set_name,
+    get_branch_dates,
+    get_register_state,
+    invalidate_categories,
+    invalidate_register_state,
+    invalidate_register_states,
+    invalidate_summaries,
+    set_branch_dates,
+    set_register_state,
+    touch,
+)
+from cash_register.pdf_cache import (
+    delete_daily_report,
+    prerender_daily_reports,
+)
 
 
 STATEMENT = (
@@ -31,15 +50,54 @@ class Category(SoftDeleteModel):
         verbose_name_plural = _('Categories')
         ordering = ['statement', 'name']
 
+    def save(self, *args, **kwargs):
+        super(Category, self).save(*args, **kwargs)
+        invalidate_categories()
+
+    def delete(self, *args, **kwargs):
+        super(Category, self).delete(*args, **kwargs)
+        invalidate_categories()
+
+
+# Date and lock flag of the earliest or the latest branch cash set
+CashSetState = namedtuple('CashSetState', ['date', 'is_locked'])
+
+# Totals of cash set day, frozen when the day is closed
+CashSetTotals = namedtuple('CashSetTotals', [
+    'opening_balance',
+    'income_total',
+    'expense_total',
+    'entries_count',
+    'closing_balance',
+])
+
 
 class DailyCashSet(models.Model):
     date = models.DateField()
     branch = models.ForeignKey(Branch)
     balance = models.DecimalField(max_digits=10, decimal_places=2)
     is_locked = models.BooleanField(default=False)
+    # Entries of archived day live in ArchivedCashEntry table
+    is_archived = models.BooleanField(default=False, editable=False)
+
+    # Snapshot of totals stored when the day is closed
+    opening_balance = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, editable=False
+    )
+    income_total = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, editable=False
+    )
+    expense_total = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, editable=False
+    )
+    entries_count = models.PositiveIntegerField(null=True, editable=False)
+    closing_balance = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, editable=False
+    )
 
     class Meta:
         get_latest_by = 'date'
+        unique_together = ('branch', 'date')
         permissions = (
             ("view_cashregister", "Can view cash register"),
             ("create_cashentry", "Can create cash entry"),
@@ -47,25 +105,365 @@ class DailyCashSet(models.Model):
             ("delete_cashentry", "Can delete cash entry"),
         )
 
-    def lock(self):
-        self.is_locked = True
-        self.save()
+    def __init__(self, *args, **kwargs):
+        super(DailyCashSet, self).__init__(*args, **kwargs)
+        self._was_locked = self.is_locked
+
+    @classmethod
+    def get_register_state(cls, branch_id):
+        """
+        Return earliest and latest cash set state of the branch,
+        cached until any of branch cash sets is saved
+        """
+        state = get_register_state(branch_id)
+        if state is None:
+            cash_sets = cls.objects.filter(branch_id=branch_id).order_by('date')
+            earliest = cash_sets.values_list('date', 'is_locked').first()
+            latest = cash_sets.values_list('date', 'is_locked').last()
+            state = (earliest, latest)
+            set_register_state(branch_id, state)
+
+        return tuple(
+            CashSetState(*cash_set) if cash_set else None
+            for cash_set in state
+        )
+
+    @classmethod
+    def get_branch_dates(cls, branch_id):
+        """
+        Return sorted ordinals of all branch cash sets dates, cached
+        together with register state
+        """
+        dates = get_branch_dates(branch_id)
+        if dates is None:
+            dates = [
+                day.toordinal() for day in cls.objects.filter(
+                    branch_id=branch_id
+                ).order_by('date').values_list('date', flat=True)
+            ]
+            set_branch_dates(branch_id, dates)
+        return dates
+
+    @classmethod
+    def get_previous_date(cls, branch_id, day):
+        """
+        Return the closest earlier date with branch cash set or None
+        """
+        dates = cls.get_branch_dates(branch_id)
+        index = bisect_left(dates, day.toordinal())
+        return date.fromordinal(dates[index - 1]) if index else None
+
+    @classmethod
+    def get_next_date(cls, branch_id, day):
+        """
+        Return the closest later date with branch cash set or None
+        """
+        dates = cls.get_branch_dates(branch_id)
+        index = bisect_right(dates, day.toordinal())
+        return date.fromordinal(dates[index]) if index < len(dates) else None
+
+    @classmethod
+    def get_month_dates(cls, branch_id, year, month):
+        """
+        Return dates of given month with branch cash sets
+        """
+        first = date(year, month, 1)
+        last = date(year + month // 12, month % 12 + 1, 1)
+        dates = cls.get_branch_dates(branch_id)
+        return [
+            date.fromordinal(ordinal) for ordinal in dates[
+                bisect_left(dates, first.toordinal()):
+                bisect_left(dates, last.toordinal())
+            ]
+        ]
+
+    @classmethod
+    def open_day(cls, day, branch_ids=None):
+        """
+        Create cash sets of given day for all branches (or given ones) at
+        once. Balances are carried from the latest earlier set of each
+        branch, found with one query. Branches which already have this or
+        later day are left untouched, branches which latest set isn't locked
+        yet are skipped. Returns created sets and skipped branch ids.
+        """
+        if branch_ids is None:
+            branch_ids = Branch.objects.values_list('id', flat=True)
+        branch_ids = set(branch_ids)
+        # Days can't be opened before already existing ones
+        branch_ids -= set(cls.objects.filter(
+            date__gte=day, branch_id__in=branch_ids
+        ).values_list('branch', flat=True))
+        if not branch_ids:
+            return [], []
+
+        table = cls._meta.db_table
+        latest_sets = cls.objects.raw(
+            'SELECT cash_set.* FROM {table} cash_set INNER JOIN ('
+            '  SELECT branch_id, MAX(date) AS latest_date FROM {table}'
+            '  WHERE date < %s GROUP BY branch_id'
+            ') latest ON latest.branch_id = cash_set.branch_id'
+            ' AND latest.latest_date = cash_set.date'.format(table=table),
+            [day]
+        )
+        latest = {cash_set.branch_id: cash_set for cash_set in latest_sets}
+
+        skipped = sorted(
+            branch_id for branch_id in branch_ids
+            if branch_id in latest and not latest[branch_id].is_locked
+        )
+        cash_sets = [
+            cls(
+                branch_id=branch_id,
+                date=day,
+                balance=latest[branch_id].balance if branch_id in latest else 0
+            )
+            for branch_id in sorted(branch_ids - set(skipped))
+        ]
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create(cash_sets)
+        except IntegrityError:
+            # Concurrent open created some of these sets first
+            cash_sets = cls._create_missing(cash_sets)
+        invalidate_register_states(
+            cash_set.branch_id for cash_set in cash_sets
+        )
+        for cash_set in cash_sets:
+            touch(cash_set_name(cash_set.branch_id, day))
+        return cash_sets, skipped
+
+    @classmethod
+    def _create_missing(cls, cash_sets):
+        """
+        Create given sets one by one, returns those which didn't exist yet
+        """
+        created = []
+        for cash_set in cash_sets:
+            try:
+                with transaction.atomic():
+                    cls.objects.bulk_create([cash_set])
+            except IntegrityError:
+                continue
+            created.append(cash_set)
+        return created
+
+    @classmethod
+    def _get_entries_totals(cls, set_ids):
+        """
+        Return income and expense sums and counts by set id, one query
+        for active and one for archived entries
+        """
+        totals = defaultdict(dict)
+        for entries in (
+                CashEntry.objects,
+                ArchivedCashEntry.objects.filter(is_deleted=False)):
+            entries_totals = entries.filter(
+                set_id__in=set_ids
+            ).values_list('set', 'statement').annotate(
+                value=Sum('price'),
+                count=Count('id')
+            ).order_by()
+            for set_id, statement, value, count in entries_totals:
+                total, total_count = totals[set_id].get(statement, (0, 0))
+                totals[set_id][statement] = (total + value, total_count + count)
+        return totals
+
+    @staticmethod
+    def _make_totals(balance, totals):
+        income, income_count = totals.get('income', (0, 0))
+        expense, expense_count = totals.get('expense', (0, 0))
+        return CashSetTotals(
+            opening_balance=balance - income - expense,
+            income_total=income,
+            expense_total=expense,
+            entries_count=income_count + expense_count,
+            closing_balance=balance
+        )
+
+    @classmethod
+    def close(cls, cash_sets, rendered_by=None):
+        """
+        Lock all given cash sets in one transaction, freezing their totals.
+        When user is given in rendered_by, daily reports of closed sets
+        are rendered on behalf of that user once transaction commits.
+        Returns number of closed sets.
+        """
+        with transaction.atomic():
+            cash_sets = list(
+                cash_sets.filter(is_locked=False).select_for_update()
+                .values_list('id', 'branch', 'date', 'balance')
+            )
+            if not cash_sets:
+                return 0
+
+            set_ids = [set_id for set_id, __, __, __ in cash_sets]
+            cls.freeze_totals(
+                [(set_id, balance) for set_id, __, __, balance in cash_sets],
+                is_locked=True
+            )
+
+        invalidate_register_states({
+            branch_id for __, branch_id, __, __ in cash_sets
+        })
+        for __, branch_id, day, __ in cash_sets:
+            touch(cash_set_name(branch_id, day))
+        if rendered_by is not None:
+            transaction.on_commit(
+                lambda: prerender_daily_reports(set_ids, rendered_by.id)
+            )
+        return len(cash_sets)
+
+    @classmethod
+    def freeze_totals(cls, cash_sets, **values):
+        """
+        Store totals snapshot of given (id, balance) pairs of cash sets
+        in one update, together with other given field values
+        """
+        if not cash_sets:
+            return
+        totals = cls._get_entries_totals([set_id for set_id, __ in cash_sets])
+        whens = defaultdict(list)
+        for set_id, balance in cash_sets:
+            snapshot = cls._make_totals(balance, totals[set_id])
+            for field, value in snapshot._asdict().items():
+                whens[field].append(When(id=set_id, then=Value(value)))
+
+        values.update(
+            (field, Case(*field_whens, output_field=cls._meta.get_field(field)))
+            for field, field_whens in whens.items()
+        )
+        cls.objects.filter(
+            id__in=[set_id for set_id, __ in cash_sets]
+        ).update(**values)
+
+    def get_totals(self):
+        """
+        Return day totals, frozen snapshot for closed days
+        """
+        if self.closing_balance is not None:
+            return CashSetTotals(
+                opening_balance=self.opening_balance,
+                income_total=self.income_total,
+                expense_total=self.expense_total,
+                entries_count=self.entries_count,
+                closing_balance=self.closing_balance
+            )
+        totals = self._get_entries_totals([self.id])
+        return self._make_totals(self.balance, totals[self.id])
+
+    def lock(self, rendered_by=None):
+        DailyCashSet.close(
+            DailyCashSet.objects.filter(id=self.id), rendered_by=rendered_by
+        )
+        self.refresh_from_db()
+        self._was_locked = self.is_locked
+
+    def apply_delta(self, delta):
+        """
+        Shift balance by given delta directly in the database, so
+        concurrent writers don't overwrite each other's changes
+        """
+        DailyCashSet.objects.filter(id=self.id).update(
+            balance=F('balance') + delta
+        )
+        self.refresh_from_db(fields=['balance'])
+        touch(cash_set_name(self.branch_id, self.date))
 
     def update(self, new_entry):
-        self.balance += new_entry.price
-        self.save()
-        new_entry.set = self
-        new_entry.save()
+        with transaction.atomic():
+            if self.id is None:
+                self.save()
+            new_entry.set = self
+            new_entry.save()
+            self.apply_delta(new_entry.price)
 
     def save(self, *args, **kwargs):
         if self.balance is None:
-            last_day = DailyCashSet.objects.filter(branch=self.branch).last()
+            last_day = DailyCashSet.objects.filter(
+                branch=self.branch
+            ).order_by('date').last()
             if last_day is not None:
                 self.balance = last_day.balance
             else:
                 self.balance = 0
 
-        super(DailyCashSet, self).save(*args, **kwargs)
+        unlocked = self._was_locked and not self.is_locked
+        with transaction.atomic():
+            # Unlocked day gets editable again, so its entries are restored
+            if unlocked and self.is_archived:
+                ArchivedCashEntry.restore(self.archived_entries.all())
+                self.is_archived = False
+            # Frozen totals are outdated once day can be edited again
+            if unlocked:
+                for field in CashSetTotals._fields:
+                    setattr(self, field, None)
+            super(DailyCashSet, self).save(*args, **kwargs)
+        invalidate_register_state(self.branch_id)
+        touch(cash_set_name(self.branch_id, self.date))
+
+        # Report rendered for locked day is outdated once day is unlocked
+        if unlocked:
+            delete_daily_report(self.id)
+        self._was_locked = self.is_locked
+
+    def get_entries(self, with_deleted=False):
+        """
+        Return entries of the day. Archived days and deleted entries are
+        read from the view over hot and archived entries in one query.
+        """
+        if not with_deleted and not self.is_archived:
+            return list(CashEntry.objects.filter(set=self).select_related(
+                'category', 'created_by'
+            ))
+
+        records = CashEntryRecord.objects.filter(set=self)
+        if not with_deleted:
+            records = records.filter(is_deleted=False)
+        return list(records.select_related('category', 'created_by'))
+
+    def delete(self, *args, **kwargs):
+        super(DailyCashSet, self).delete(*args, **kwargs)
+        invalidate_register_state(self.branch_id)
+        touch(cash_set_name(self.branch_id, self.date))
+
+
+class ConfirmationCounter(models.Model):
+    """
+    Last KP/KW confirmation number handed out for branch, statement and year
+    """
+    branch = models.ForeignKey(Branch)
+    statement = models.CharField(max_length=8, choices=STATEMENT)
+    year = models.PositiveSmallIntegerField()
+    last_number = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        default_permissions = ()
+        unique_together = ('branch', 'statement', 'year')
+
+    @classmethod
+    def allocate(cls, branch_id, statement, year, count=1):
+        """
+        Reserve `count` consecutive numbers, returns first of them
+        """
+        with transaction.atomic():
+            counter, __ = cls.objects.select_for_update().get_or_create(
+                branch_id=branch_id,
+                statement=statement,
+                year=year
+            )
+            first_number = counter.last_number + 1
+            counter.last_number = F('last_number') + count
+            counter.save(update_fields=['last_number'])
+        return first_number
+
+
+def format_confirmation_id(statement, year, number):
+    # for eg. KP/15/0001
+    return "{descriptor}/{year:02d}/{number:04d}".format(
+        descriptor='KP' if statement == 'income' else 'KW',
+        year=year % 100,
+        number=number
+    )
 
 
 class CashEntry(SoftDeleteModel):
@@ -86,6 +484,11 @@ class CashEntry(SoftDeleteModel):
         get_latest_by = 'created_date'
         default_permissions = ()
         verbose_name_plural = _('Cash entries')
+        index_together = [('set', 'created_date'), ('created_date', 'id')]
+
+    def __init__(self, *args, **kwargs):
+        super(CashEntry, self).__init__(*args, **kwargs)
+        self._rollup_state = self._get_rollup_state()
 
     @property
     def is_income(self):
@@ -96,34 +499,337 @@ class CashEntry(SoftDeleteModel):
         return self.statement == 'expense'
 
     def _set_confirmation_id(self):
-        try:
-            latest = CashEntry.objects.filter(
-                confirmation=True,
-                statement=self.statement,
-                set__branch=self.set.branch,
-                created_date__year=self.created_date.year
-            ).latest()
-        except self.DoesNotExist:
-            latest = None
-
-        # Extract last entry number from confirmation_id
-        last_number = int(latest.confirmation_id[6:]) if latest else 0
-
-        # for eg. KP/15/0001
-        self.confirmation_id = "{descriptor}/{year}/{number:04d}".format(
-            descriptor='KP' if self.is_income else 'KW',
-            year=self.created_date.strftime('%y'),
-            number=last_number + 1
+        number = ConfirmationCounter.allocate(
+            branch_id=self.set.branch_id,
+            statement=self.statement,
+            year=self.created_date.year
         )
+        self.confirmation_id = format_confirmation_id(
+            self.statement, self.created_date.year, number
+        )
+
+    @classmethod
+    def set_confirmation_ids(cls, entries):
+        """
+        Allocate confirmation ids for many entries at once, one counter
+        increment per branch, statement and year. Entries aren't saved.
+        """
+        groups = defaultdict(list)
+        for entry in entries:
+            if not entry.created_date:
+                entry.created_date = datetime.now(settings.LOCAL_TZ)
+            if entry.confirmation and not entry.confirmation_id:
+                key = (
+                    entry.set.branch_id,
+                    entry.statement,
+                    entry.created_date.year
+                )
+                groups[key].append(entry)
+
+        with transaction.atomic():
+            for (branch_id, statement, year), group in groups.items():
+                number = ConfirmationCounter.allocate(
+                    branch_id, statement, year, count=len(group)
+                )
+                group.sort(key=lambda entry: entry.created_date)
+                for offset, entry in enumerate(group):
+                    entry.confirmation_id = format_confirmation_id(
+                        statement, year, number + offset
+                    )
+        return entries
+
+    def refresh_for_update(self):
+        """
+        Lock entry row until the end of transaction and return its stored
+        copy. Rollup changes are computed from the stored state from now
+        on, so concurrent writers don't apply the same change twice.
+        """
+        stored = CashEntry.all_objects.select_for_update().get(id=self.id)
+        self._rollup_state = stored._get_rollup_state()
+        return stored
+
+    def _get_rollup_state(self):
+        if self.id is None or self.is_deleted:
+            return None
+        return self.set_id, self.category_id, self.statement, self.price
+
+    def _update_rollup(self):
+        """
+        Move entry price and count between monthly rollups according
+        to what has changed since entry was loaded or last saved
+        """
+        old_state = self._rollup_state
+        new_state = self._get_rollup_state()
+        if old_state == new_state:
+            return
+
+        if old_state and new_state and old_state[:3] == new_state[:3]:
+            CategoryRollup.add(
+                self.set, self.category_id, self.statement,
+                value=new_state[3] - old_state[3], count=0
+            )
+        else:
+            if old_state is not None:
+                set_id, category_id, statement, price = old_state
+                old_set = (
+                    self.set if set_id == self.set_id
+                    else DailyCashSet.objects.get(id=set_id)
+                )
+                CategoryRollup.add(
+                    old_set, category_id, statement, value=-price, count=-1
+                )
+            if new_state is not None:
+                CategoryRollup.add(
+                    self.set, self.category_id, self.statement,
+                    value=self.price, count=1
+                )
+        self._rollup_state = new_state
 
     def save(self, *args, **kwargs):
         if not self.created_date:
             self.created_date = datetime.now(settings.LOCAL_TZ)
-        if self.confirmation and not self.confirmation_id:
-            self._set_confirmation_id()
-        super(CashEntry, self).save(*args, **kwargs)
+        with transaction.atomic():
+            if self.confirmation and not self.confirmation_id:
+                self._set_confirmation_id()
+            super(CashEntry, self).save(*args, **kwargs)
+            self._update_rollup()
+        invalidate_summaries(self.set.date)
+        touch(cash_set_name(self.set.branch_id, self.set.date))
+        touch('entries')
+        if self.set.is_locked:
+            delete_daily_report(self.set_id)
 
     def delete(self, *args, **kwargs):
-        self.set.balance -= self.price
-        self.set.save()
-        super(CashEntry, self).delete(*args, **kwargs)
+        with transaction.atomic():
+            stored = self.refresh_for_update()
+            if stored.is_deleted:
+                # Deleted concurrently, its price is already subtracted
+                self.is_deleted = True
+                return
+            self.price = stored.price
+            super(CashEntry, self).delete(*args, **kwargs)
+            self._update_rollup()
+            self.set.apply_delta(-self.price)
+        invalidate_summaries(self.set.date)
+        touch(cash_set_name(self.set.branch_id, self.set.date))
+        touch('entries')
+        if self.set.is_locked:
+            delete_daily_report(self.set_id)
+
+
+class CategoryRollup(models.Model):
+    """
+    Monthly sum and count of active cash entries per branch and category
+    """
+    branch = models.ForeignKey(Branch)
+    category = models.ForeignKey(Category)
+    statement = models.CharField(max_length=8, choices=STATEMENT)
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    summary_value = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0
+    )
+    entries_count = models.IntegerField(default=0)
+
+    class Meta:
+        default_permissions = ()
+        unique_together = ('branch', 'category', 'statement', 'year', 'month')
+
+    @classmethod
+    def add(cls, cash_set, category_id, statement, value, count):
+        rollup, __ = cls.objects.get_or_create(
+            branch_id=cash_set.branch_id,
+            category_id=category_id,
+            statement=statement,
+            year=cash_set.date.year,
+            month=cash_set.date.month
+        )
+        cls.objects.filter(id=rollup.id).update(
+            summary_value=F('summary_value') + value,
+            entries_count=F('entries_count') + count
+        )
+
+    @classmethod
+    def rebuild(cls, branch_ids=None):
+        """
+        Recompute rollups from cash entries, returns number of rollups
+        """
+        entries = CashEntry.objects.all()
+        archived = ArchivedCashEntry.objects.filter(is_deleted=False)
+        rollups = cls.objects.all()
+        if branch_ids is not None:
+            entries = entries.filter(set__branch_id__in=branch_ids)
+            archived = archived.filter(set__branch_id__in=branch_ids)
+            rollups = rollups.filter(branch_id__in=branch_ids)
+
+        # Group by day in database, months are folded in python
+        totals = defaultdict(lambda: [0, 0])
+        for queryset in (entries, archived):
+            daily_totals = queryset.values_list(
+                'set__branch', 'category', 'statement', 'set__date'
+            ).annotate(
+                summary_value=Sum('price'),
+                entries_count=Count('id')
+            ).order_by()
+            for branch_id, category_id, statement, day, value, count \
+                    in daily_totals:
+                key = (branch_id, category_id, statement, day.year, day.month)
+                totals[key][0] += value
+                totals[key][1] += count
+
+        with transaction.atomic():
+            rollups.delete()
+            cls.objects.bulk_create([
+                cls(
+                    branch_id=branch_id,
+                    category_id=category_id,
+                    statement=statement,
+                    year=year,
+                    month=month,
+                    summary_value=value,
+                    entries_count=count
+                )
+                for (branch_id, category_id, statement, year, month),
+                (value, count) in totals.items()
+            ])
+        return len(totals)
+
+
+# Fields copied between hot and archived cash entries
+ARCHIVED_FIELDS = (
+    'id',
+    'is_deleted',
+    'set',
+    'created_by',
+    'created_date',
+    'statement',
+    'category',
+    'price',
+    'document_refer',
+    'person_refer',
+    'note',
+    'confirmation',
+    'confirmation_id',
+)
+
+
+class ArchivedCashEntry(models.Model):
+    """
+    Cash entry moved out of the hot table, either soft deleted or from
+    a closed year. Entry keeps its id, so it can be restored unchanged.
+    """
+    id = models.IntegerField(primary_key=True)
+    is_deleted = models.BooleanField(default=False)
+    set = models.ForeignKey(DailyCashSet, related_name='archived_entries')
+    created_by = models.ForeignKey(User, related_name='+')
+    created_date = models.DateTimeField()
+    statement = models.CharField(max_length=8, choices=STATEMENT)
+    category = models.ForeignKey(Category, related_name='+')
+    price = models.DecimalField(max_digits=8, decimal_places=2, default=0.00)
+    document_refer = models.CharField(max_length=128, blank=True)
+    person_refer = models.CharField(max_length=256, blank=True)
+    note = models.TextField(blank=True)
+    confirmation = models.BooleanField(default=False)
+    confirmation_id = models.CharField(max_length=16, blank=True)
+    archived_date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("created_date",)
+        default_permissions = ()
+        verbose_name_plural = _('Archived cash entries')
+
+    @property
+    def is_income(self):
+        return self.statement == 'income'
+
+    @property
+    def is_expense(self):
+        return self.statement == 'expense'
+
+    @classmethod
+    def _move(cls, entries, source, target):
+        """
+        Copy rows of given queryset to the other table and delete them from
+        source one. Model save and delete aren't called, so balances and
+        rollups stay as they are. Returns number of moved entries.
+        """
+        rows = list(entries.values_list(*ARCHIVED_FIELDS))
+        if not rows:
+            return 0
+
+        attnames = [
+            target._meta.get_field(name).attname for name in ARCHIVED_FIELDS
+        ]
+        with transaction.atomic():
+            target.objects.bulk_create([
+                target(**dict(zip(attnames, row))) for row in rows
+            ])
+            # Plain queryset delete, soft deleting one would keep the rows
+            models.QuerySet.delete(source.filter(
+                id__in=[row[0] for row in rows]
+            ))
+
+        changed = set(
+            (branch_id, day) for branch_id, day in DailyCashSet.objects.filter(
+                id__in=set(row[2] for row in rows)
+            ).values_list('branch', 'date')
+        )
+        for branch_id, day in changed:
+            touch(cash_set_name(branch_id, day))
+        touch('entries')
+        return len(rows)
+
+    @classmethod
+    def archive(cls, entries):
+        """
+        Move given queryset of hot cash entries to the archive
+        """
+        return cls._move(entries, source=CashEntry.all_objects, target=cls)
+
+    @classmethod
+    def restore(cls, entries):
+        """
+        Move given queryset of archived cash entries back to the hot table
+        """
+        return cls._move(entries, source=cls.objects, target=CashEntry)
+
+
+class CashEntryRecord(models.Model):
+    """
+    Read only view over hot and archived cash entries, used by readers which
+    have to see whole days regardless of where their entries are stored.
+    Entries are written through CashEntry and ArchivedCashEntry only.
+    """
+    id = models.IntegerField(primary_key=True)
+    is_deleted = models.BooleanField(default=False)
+    is_archived = models.BooleanField(default=False)
+    set = models.ForeignKey(
+        DailyCashSet, related_name='+', on_delete=models.DO_NOTHING
+    )
+    created_by = models.ForeignKey(
+        User, related_name='+', on_delete=models.DO_NOTHING
+    )
+    created_date = models.DateTimeField()
+    statement = models.CharField(max_length=8, choices=STATEMENT)
+    category = models.ForeignKey(
+        Category, related_name='+', on_delete=models.DO_NOTHING
+    )
+    price = models.DecimalField(max_digits=8, decimal_places=2, default=0.00)
+    document_refer = models.CharField(max_length=128, blank=True)
+    person_refer = models.CharField(max_length=256, blank=True)
+    note = models.TextField(blank=True)
+    confirmation = models.BooleanField(default=False)
+    confirmation_id = models.CharField(max_length=16, blank=True)
+
+    class Meta:
+        managed = False
+        ordering = ("created_date", "id")
+        default_permissions = ()
+
+    @property
+    def is_income(self):
+        return self.statement == 'income'
+
+    @property
+    def is_expense(self):
+        return self.statement == 'expense'
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import logging
+import threading
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.http import HttpRequest
+
+
+DAILY_REPORT_PATH = 'cash_register/reports/daily/{cash_set_id}-locked.pdf'
+
+logger = logging.getLogger(__name__)
+
+
+def _get_path(cash_set_id):
+    return DAILY_REPORT_PATH.format(cash_set_id=cash_set_id)
+
+
+def load_daily_report(cash_set_id):
+    """
+    Return stored PDF of locked cash set or None when not rendered yet
+    """
+    path = _get_path(cash_set_id)
+    if not default_storage.exists(path):
+        return None
+    with default_storage.open(path, 'rb') as report_file:
+        return report_file.read()
+
+
+def save_daily_report(cash_set_id, content):
+    path = _get_path(cash_set_id)
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    default_storage.save(path, ContentFile(content))
+
+
+def delete_daily_report(cash_set_id):
+    default_storage.delete(_get_path(cash_set_id))
+
+
+def render_daily_reports(cash_set_ids, user_id):
+    """
+    Render and store daily reports of given locked cash sets on behalf
+    of given user
+    """
+    # Reports import cash register models, which import this module
+    from reports.cash_reports import CashRegisterDailyReportPDF
+
+    request = HttpRequest()
+    request.method = 'GET'
+    request.user = User.objects.get(id=user_id)
+    view = CashRegisterDailyReportPDF.as_view()
+    for cash_set_id in cash_set_ids:
+        try:
+            response = view(request, cash_set_id=str(cash_set_id))
+            if response.status_code == 200:
+                save_daily_report(cash_set_id, response.content)
+        except Exception:
+            # Report is rendered on first request anyway
+            logger.exception('Cannot prerender daily report %s', cash_set_id)
+
+
+def prerender_daily_reports(cash_set_ids, user_id):
+    """
+    Render daily reports of just locked cash sets in background thread,
+    it has its own database connection and sees only committed lock
+    """
+    def render():
+        try:
+            render_daily_reports(cash_set_ids, user_id)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=render)
+    thread.daemon = True
+    thread.start()
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+from multiprocessing import Pool
+
+from django import db
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+
+from cash_register.cache import cash_set_name, touch
+from cash_register.models import ArchivedCashEntry, CashEntry, DailyCashSet
+from cash_register.pdf_cache import delete_daily_report
+
+
+# Cash set which stored balance differs from balance recomputed from entries,
+# opening is expected balance of the day before its entries
+BalanceDifference = namedtuple(
+    'BalanceDifference',
+    ['set_id', 'branch_id', 'date', 'stored', 'expected', 'opening']
+)
+
+
+def find_differences(branch_id):
+    """
+    Recompute day by day balances of branch from its active and archived
+    entries, three queries per branch no matter how many days it has.
+    Chain starts with opening balance of the first day, that is its stored
+    balance without its entries.
+    """
+    cash_sets = DailyCashSet.objects.filter(branch_id=branch_id).order_by(
+        'date'
+    ).values_list('id', 'date', 'balance')
+    totals = defaultdict(Decimal)
+    for entries in (CashEntry.objects, ArchivedCashEntry.objects):
+        set_totals = entries.filter(
+            set__branch_id=branch_id, is_deleted=False
+        ).values_list('set').annotate(total=Sum('price')).order_by()
+        for set_id, total in set_totals:
+            totals[set_id] += total
+
+    differences = []
+    balance = None
+    for set_id, day, stored in cash_sets:
+        if balance is None:
+            balance = stored - totals.get(set_id, 0)
+        opening = balance
+        balance += totals.get(set_id, 0)
+        if stored != balance:
+            differences.append(BalanceDifference(
+                set_id, branch_id, day, stored, balance, opening
+            ))
+    return differences
+
+
+def _by_set(differences, field):
+    """
+    CASE expression taking given field of difference of every cash set,
+    only sets with frozen snapshot get a new snapshot value
+    """
+    if field == 'balance':
+        attribute, condition = 'expected', {}
+    else:
+        attribute, condition = {
+            'opening_balance': 'opening',
+            'closing_balance': 'expected',
+        }[field], {field + '__isnull': False}
+    return Case(
+        *[
+            When(
+                id=difference.set_id,
+                then=Value(getattr(difference, attribute)),
+                **condition
+            )
+            for difference in differences
+        ],
+        default=F(field),
+        output_field=DecimalField(max_digits=10, decimal_places=2)
+    )
+
+
+def repair(differences):
+    """
+    Store expected balances, together with snapshots of locked days, one
+    update query per call. Stored reports of repaired days are outdated.
+    """
+    if not differences:
+        return 0
+    with transaction.atomic():
+        repaired = DailyCashSet.objects.filter(
+            id__in=[difference.set_id for difference in differences]
+        ).update(**dict(
+            (field, _by_set(differences, field))
+            for field in ('balance', 'opening_balance', 'closing_balance')
+        ))
+    for difference in differences:
+        touch(cash_set_name(difference.branch_id, difference.date))
+        delete_daily_report(difference.set_id)
+    return repaired
+
+
+def _reconcile_branch(args):
+    branch_id, fix = args
+    try:
+        differences = find_differences(branch_id)
+        if fix:
+            repair(differences)
+        return differences
+    finally:
+        db.connections.close_all()
+
+
+def reconcile(branch_ids=None, workers=1, fix=False):
+    """
+    Reconcile balance chains of given branches (all by default) in
+    worker processes, returns list of found differences
+    """
+    if branch_ids is None:
+        branch_ids = list(DailyCashSet.objects.values_list(
+            'branch', flat=True
+        ).distinct().order_by('branch_id'))
+    tasks = [(branch_id, fix) for branch_id in branch_ids]
+
+    if workers <= 1:
+        results = [find_differences(branch_id) for branch_id in branch_ids]
+        if fix:
+            for differences in results:
+                repair(differences)
+    else:
+        # Forked workers must not share parent's database connections
+        db.connections.close_all()
+        pool = Pool(processes=workers)
+        try:
+            results = pool.map(_reconcile_branch, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    return [difference for differences in results for difference in differences]
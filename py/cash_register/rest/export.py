@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import csv
+import json
+
+from django.utils import six
+from rest_framework.utils.encoders import JSONEncoder
+
+from cash_register.rest.pagination import seek
+
+
+class Echo(object):
+    """
+    File-like object which returns written value instead of storing it
+    """
+
+    def write(self, value):
+        return value
+
+
+def iterate_in_chunks(queryset, chunk_size=1000, ordering_field='created_date'):
+    """
+    Yield chunks of queryset objects, every chunk is a separate keyset query
+    so only one chunk is kept in memory at once
+    """
+    queryset = queryset.order_by(ordering_field, 'id')
+    position = None
+    while True:
+        chunk_queryset = queryset
+        if position is not None:
+            chunk_queryset = seek(queryset, ordering_field, position)
+        chunk = list(chunk_queryset[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1]
+        position = getattr(last, ordering_field), last.id
+
+
+def _encode(value):
+    if value is None:
+        value = ''
+    if six.PY2:
+        return six.text_type(value).encode('utf-8')
+    return value
+
+
+def stream_csv(rows_chunks, fields):
+    writer = csv.writer(Echo())
+    yield writer.writerow([_encode(field) for field in fields])
+    for rows in rows_chunks:
+        for row in rows:
+            yield writer.writerow([_encode(row[field]) for field in fields])
+
+
+def stream_ndjson(rows_chunks):
+    for rows in rows_chunks:
+        for row in rows:
+            yield json.dumps(row, cls=JSONEncoder) + '\n'
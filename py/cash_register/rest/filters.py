@@ -5,7 +5,11 @@ from __future__ import unicode_literals
 import django_filters
 from rest_framework.filters import FilterSet
 
-from cash_register.models import CashEntry
+from cash_register.models import (
+    ArchivedCashEntry,
+    CashEntry,
+    CashEntryRecord,
+)
 
 
 class CashEntryFilter(FilterSet):
@@ -15,3 +19,17 @@ class CashEntryFilter(FilterSet):
     class Meta:
         model = CashEntry
         fields = ['year', 'month', 'category']
+
+
+class ArchivedCashEntryFilter(CashEntryFilter):
+
+    class Meta:
+        model = ArchivedCashEntry
+        fields = ['year', 'month', 'category', 'is_deleted']
+
+
+class CashEntryRecordFilter(CashEntryFilter):
+
+    class Meta:
+        model = CashEntryRecord
+        fields = ['year', 'month', 'category']
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import base64
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def seek(queryset, ordering_field, position):
+    """
+    Filter queryset ordered by (ordering field, id) to rows after position
+    """
+    value, pk = position
+    return queryset.filter(
+        Q(**{ordering_field + '__gt': value}) |
+        Q(**{ordering_field: value, 'id__gt': pk})
+    )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward only pagination keyed on (ordering field, id). Every page is
+    one indexed range query, without COUNT(*) and without OFFSET.
+    """
+    ordering_field = 'created_date'
+    cursor_query_param = 'cursor'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(self.ordering_field, 'id')
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = seek(queryset, self.ordering_field, position)
+
+        page = list(queryset[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+
+        self.next_position = None
+        if self.has_next:
+            last = page[-1]
+            self.next_position = (getattr(last, self.ordering_field), last.id)
+        return page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            decoded = base64.urlsafe_b64decode(encoded.encode('ascii'))
+            value, pk = decoded.decode('ascii').split('|')
+            value = parse_datetime(value)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    def encode_cursor(self, position):
+        value, pk = position
+        encoded = '{}|{}'.format(value.isoformat(), pk).encode('ascii')
+        return base64.urlsafe_b64encode(encoded).decode('ascii')
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position)
+        )
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
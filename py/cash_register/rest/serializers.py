@@ -4,7 +4,13 @@ from __future__ import unicode_literals
 
 from rest_framework import serializers
 
-from cash_register.models import CashEntry, Category as CashCategory
+from business.models import Branch
+from cash_register.models import (
+    ArchivedCashEntry,
+    CashEntry,
+    CashEntryRecord,
+    Category as CashCategory,
+)
 
 
 class CashEntrySerializer(serializers.ModelSerializer):
@@ -28,6 +34,23 @@ class CashEntrySerializer(serializers.ModelSerializer):
         )
 
 
+class CashEntryRecordSerializer(CashEntrySerializer):
+
+    class Meta:
+        model = CashEntryRecord
+        fields = CashEntrySerializer.Meta.fields
+
+
+class ArchivedCashEntrySerializer(CashEntrySerializer):
+
+    class Meta:
+        model = ArchivedCashEntry
+        fields = CashEntrySerializer.Meta.fields + (
+            "is_deleted",
+            "archived_date",
+        )
+
+
 class CashCategorySerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -37,3 +60,30 @@ class CashCategorySerializer(serializers.ModelSerializer):
             "shortname",
             "statement",
         )
+
+
+class CashDaySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    branches = serializers.PrimaryKeyRelatedField(
+        queryset=Branch.objects.all(),
+        many=True,
+        required=False,
+    )
+
+    def validate_branches(self, value):
+        return [branch.id for branch in value]
+
+
+class CloseDaysSerializer(CashDaySerializer):
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, data):
+        if data.get('date_to') and data['date_to'] < data['date']:
+            raise serializers.ValidationError('date_to is before date')
+        return data
+
+
+class CalendarSerializer(serializers.Serializer):
+    branch = serializers.PrimaryKeyRelatedField(queryset=Branch.objects.all())
+    year = serializers.IntegerField(min_value=1, max_value=9998)
+    month = serializers.IntegerField(min_value=1, max_value=12)
@@ -2,12 +2,23 @@
 
 from __future__ import unicode_literals
 
+from django.conf.urls import url
 from rest_framework import routers
 
-from cash_register.rest.views import CashCategoryViewSet, CashEntryViewSet
+from cash_register.rest.views import (
+    CalendarView,
+    CashCategoryViewSet,
+    CashEntryViewSet,
+    CloseDaysView,
+    OpenDayView,
+)
 
 router = routers.DefaultRouter()
 router.register(r'entries', CashEntryViewSet, base_name='entry')
 router.register(r'categories', CashCategoryViewSet, base_name='category')
 
-urlpatterns = router.urls
+urlpatterns = [
+    url(r'^days/open/$', OpenDayView.as_view(), name='open-day'),
+    url(r'^days/close/$', CloseDaysView.as_view(), name='close-days'),
+    url(r'^calendar/$', CalendarView.as_view(), name='calendar'),
+] + router.urls
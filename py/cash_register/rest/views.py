@@ -5,16 +5,50 @@ from __future__ import unicode_literals
 import urllib
 from copy import copy
 
-from rest_framework import viewsets
-from rest_framework.permissions import IsAdminUser
+from django.core.cache import cache
+from django.db.models import Sum
+from django.http import StreamingHttpResponse
+from rest_framework import status, viewsets
+from rest_framework.decorators import list_route
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.reverse import reverse
 
-from cash_register.models import Category as CashCategory, CashEntry
-from cash_register.rest.filters import CashEntryFilter
+from bmsutils.permissions import auth_branch_ids
+from cash_register.cache import SUMMARY_TIMEOUT, get_changed, get_summary_key
+from cash_register.categories import get_categories
+from cash_register.conditional import (
+    get_not_modified_response,
+    make_etag,
+    set_conditional_headers,
+)
+from cash_register.importer import import_entries
+from cash_register.models import (
+    ArchivedCashEntry,
+    Category as CashCategory,
+    CashEntryRecord,
+    CategoryRollup,
+    DailyCashSet,
+)
+from cash_register.rest.export import (
+    iterate_in_chunks,
+    stream_csv,
+    stream_ndjson,
+)
+from cash_register.rest.filters import (
+    ArchivedCashEntryFilter,
+    CashEntryRecordFilter,
+)
+from cash_register.rest.pagination import KeysetPagination
 from cash_register.rest.serializers import (
     CashCategorySerializer,
-    CashEntrySerializer,
+    CalendarSerializer,
+    CashDaySerializer,
+    ArchivedCashEntrySerializer,
+    CashEntryRecordSerializer,
+    CloseDaysSerializer,
 )
 
 
@@ -27,48 +61,65 @@ class CashCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = CashCategory.objects.all()
 
     def list(self, *args, **kwargs):
-        categories = []
-
-        for category in CashCategory.objects.all():
-            prices = self._get_entries_prices(category)
-
-            if not prices:
-                continue
+        params = self.request.query_params
+        cache_key = get_summary_key(
+            year=params.get('year'),
+            month=params.get('month'),
+            statement=params.get('statement'),
+        )
+        summaries = cache.get(cache_key)
+        if summaries is None:
+            summaries = list(self._get_summaries())
+            cache.set(cache_key, summaries, SUMMARY_TIMEOUT)
 
-            categories.append({
+        totals = {
+            category_id: (total_value, total_count)
+            for category_id, total_value, total_count in summaries
+        }
+        categories = [
+            {
                 "id": category.id,
                 "name": category.name,
                 "shortname": category.shortname,
                 "statement": category.statement,
-                "summary_value": sum(prices),
-                "entries_count": len(prices),
-                "entries": self._get_entries_url(category)
-            })
+                "summary_value": totals[category.id][0],
+                "entries_count": totals[category.id][1],
+                "entries": self._get_entries_url(category.id)
+            }
+            for category in get_categories(params.get('statement'))
+            if category.id in totals
+        ]
 
         return Response({
             "count": len(categories),
             "results": categories
         })
 
-    def _get_entries_prices(self, category):
+    def _get_summaries(self):
+        """
+        Sum monthly category rollups, cost doesn't depend on entries count.
+        Category details and order are taken from the categories cache.
+        """
         filter_fields = {
-            'year': 'set__date__year',
-            'month': 'set__date__month',
-            'statement': 'category__statement'
+            'year': 'year',
+            'month': 'month',
         }
         qs_filters = {
             filter_fields[key]: value
             for key, value in self.request.query_params.items()
             if key in filter_fields
         }
-        return category.cashentry_set.filter(**qs_filters).values_list(
-            'price', flat=True
-        )
+        return CategoryRollup.objects.filter(
+            entries_count__gt=0, **qs_filters
+        ).values_list('category').annotate(
+            total_value=Sum('summary_value'),
+            total_count=Sum('entries_count'),
+        ).order_by()
 
-    def _get_entries_url(self, category):
+    def _get_entries_url(self, category_id):
         query_params = copy(self.request.query_params)
         query_params.pop('statement', None)
-        query_params['category'] = category.id
+        query_params['category'] = category_id
         return (
             reverse('cash_register_api:entry-list', request=self.request) +
             '?%s' % urllib.urlencode(query_params)
@@ -77,9 +128,204 @@ class CashCategoryViewSet(viewsets.ReadOnlyModelViewSet):
 
 class CashEntryViewSet(viewsets.ReadOnlyModelViewSet):
     """
-    API endpoint that allows cash entries to be seen.
+    API endpoint that allows cash entries to be seen. Entries of archived
+    days are listed along with hot ones, the archive itself (with deleted
+    entries) is listed instead with `archived` parameter.
+    """
+    permission_classes = (IsAdminUser,)
+    queryset = CashEntryRecord.objects.filter(is_deleted=False).select_related(
+        'set__branch', 'category', 'created_by'
+    )
+    serializer_class = CashEntryRecordSerializer
+    archived_queryset = ArchivedCashEntry.objects.select_related(
+        'set__branch', 'category', 'created_by'
+    )
+    archived_query_param = 'archived'
+    cursor_pagination_class = KeysetPagination
+    export_chunk_size = 1000
+    export_content_types = {
+        'csv': 'text/csv; charset=utf-8',
+        'ndjson': 'application/x-ndjson; charset=utf-8',
+    }
+
+    @property
+    def is_archived(self):
+        value = self.request.query_params.get(self.archived_query_param, '')
+        return value.lower() in ('1', 'true')
+
+    @property
+    def filter_class(self):
+        if self.is_archived:
+            return ArchivedCashEntryFilter
+        return CashEntryRecordFilter
+
+    def get_queryset(self):
+        if self.is_archived:
+            return self.archived_queryset.all()
+        return super(CashEntryViewSet, self).get_queryset()
+
+    def get_serializer_class(self):
+        if self.is_archived:
+            return ArchivedCashEntrySerializer
+        return super(CashEntryViewSet, self).get_serializer_class()
+
+    def _conditional(self, request, render, *args, **kwargs):
+        """
+        Skip fetching and serialization when client has current entries
+        """
+        last_modified = get_changed('entries')
+        etag = make_etag(
+            last_modified,
+            request.get_full_path(),
+            request.user.id,
+            request.accepted_renderer.format,
+        )
+        response = get_not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        response = render(request, *args, **kwargs)
+        return set_conditional_headers(response, etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(
+            request,
+            super(CashEntryViewSet, self).list,
+            *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(
+            request,
+            super(CashEntryViewSet, self).retrieve,
+            *args, **kwargs
+        )
+
+    @property
+    def paginator(self):
+        """
+        Use keyset pagination when client sends cursor parameter,
+        empty cursor starts from the oldest entry
+        """
+        cursor_param = self.cursor_pagination_class.cursor_query_param
+        if cursor_param not in self.request.query_params:
+            return super(CashEntryViewSet, self).paginator
+        if not hasattr(self, '_cursor_paginator'):
+            self._cursor_paginator = self.cursor_pagination_class()
+        return self._cursor_paginator
+
+    @list_route()
+    def export(self, request):
+        """
+        Stream all filtered entries as CSV (default) or NDJSON file
+        """
+        output = request.query_params.get('output', 'csv')
+        if output not in self.export_content_types:
+            raise ValidationError({'output': 'Choose csv or ndjson'})
+
+        queryset = self.filter_queryset(self.get_queryset())
+        rows_chunks = (
+            self.get_serializer(chunk, many=True).data
+            for chunk in iterate_in_chunks(queryset, self.export_chunk_size)
+        )
+        if output == 'csv':
+            fields = self.get_serializer_class().Meta.fields
+            content = stream_csv(rows_chunks, fields)
+        else:
+            content = stream_ndjson(rows_chunks)
+
+        response = StreamingHttpResponse(
+            content,
+            content_type=self.export_content_types[output]
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename="cash_entries.{}"'.format(output)
+        )
+        return response
+
+    @list_route(methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        """
+        Import list of entries in one transaction, nothing is imported
+        when any of entries is invalid
+        """
+        if not isinstance(request.data, list):
+            raise ValidationError('Expected list of entries')
+
+        entries, errors = import_entries(request.data, request.user)
+        if errors:
+            return Response(
+                {'errors': errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(
+            {'count': len(entries)},
+            status=status.HTTP_201_CREATED
+        )
+
+
+class OpenDayView(APIView):
+    """
+    API endpoint that opens cash register day for all or given branches.
     """
     permission_classes = (IsAdminUser,)
-    queryset = CashEntry.objects.select_related('set__branch', 'category', 'created_by')
-    serializer_class = CashEntrySerializer
-    filter_class = CashEntryFilter
+
+    def post(self, request, *args, **kwargs):
+        serializer = CashDaySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        cash_sets, skipped = DailyCashSet.open_day(
+            serializer.validated_data['date'],
+            serializer.validated_data.get('branches') or None
+        )
+        return Response({
+            "opened": [cash_set.branch_id for cash_set in cash_sets],
+            "skipped": skipped,
+        }, status=status.HTTP_201_CREATED)
+
+
+class CloseDaysView(APIView):
+    """
+    API endpoint that closes cash register days of all or given branches.
+    """
+    permission_classes = (IsAdminUser,)
+
+    def post(self, request, *args, **kwargs):
+        serializer = CloseDaysSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        cash_sets = DailyCashSet.objects.filter(
+            date__gte=data['date'],
+            date__lte=data.get('date_to') or data['date']
+        )
+        if data.get('branches'):
+            cash_sets = cash_sets.filter(branch_id__in=data['branches'])
+
+        return Response({
+            "closed": DailyCashSet.close(cash_sets),
+        })
+
+
+class CalendarView(APIView):
+    """
+    API endpoint that lists dates of month with branch cash sets.
+    """
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        serializer = CalendarSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        branch = data['branch']
+        if branch.id not in auth_branch_ids(request.user):
+            raise PermissionDenied()
+
+        return Response({
+            "branch": branch.id,
+            "year": data['year'],
+            "month": data['month'],
+            "dates": DailyCashSet.get_month_dates(
+                branch.id, data['year'], data['month']
+            ),
+        })
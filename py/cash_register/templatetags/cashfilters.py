@@ -4,6 +4,8 @@
 from django import template
 from datetime import timedelta
 
+from cash_register.models import DailyCashSet
+
 
 register = template.Library()
 
@@ -28,3 +30,19 @@ def to_next(value, next):
         return next_date.month
     elif next == 'D' or next == 'd':
         return next_date.day
+
+
+@register.simple_tag
+def previous_cash_day(branch, value):
+    """
+    Previous day with cash set of the branch, skips days without activity
+    """
+    return DailyCashSet.get_previous_date(branch.id, value)
+
+
+@register.simple_tag
+def next_cash_day(branch, value):
+    """
+    Next day with cash set of the branch, skips days without activity
+    """
+    return DailyCashSet.get_next_date(branch.id, value)
@@ -2,8 +2,10 @@
 # -*- coding: utf-8 -*-
 
 import httplib as http
+import mock
 
 from django.contrib.auth.models import User, Permission, Group
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test import TestCase
 from model_mommy import mommy
@@ -17,6 +19,7 @@ class CashRegisterActionsTestCase(TestCase):
     """
 
     def setUp(self):
+        cache.clear()
         self.cash_set = mommy.make(DailyCashSet)
         self.cash_entry = mommy.make(
             CashEntry,
@@ -40,6 +43,11 @@ class CashRegisterActionsTestCase(TestCase):
         params['id'] = self.cash_set.id
         self.lock_url = reverse('cash_register:lock', kwargs=params)
 
+        self.report_url = reverse(
+            'cash_register:pdf_daily_report',
+            kwargs={'cash_set_id': self.cash_set.id}
+        )
+
     def _login_as_user(self, permission=None, auth_branch=True):
         user = User.objects.create_user(
             'test_user', '', 'password'
@@ -135,3 +143,34 @@ class CashRegisterActionsTestCase(TestCase):
         self.assertEqual(response.status_code, http.FOUND)
         self.assertTrue(response.url.endswith(self.index_url))
         self.assertTrue(DailyCashSet.objects.get(id=self.cash_set.id).is_locked)
+
+    @mock.patch('cash_register.views.load_daily_report')
+    def test_stored_daily_report_served(self, mocked_load):
+        """
+        Stored report of locked cash set should be served without rendering
+        """
+        mocked_load.return_value = b'%PDF stored report'
+        DailyCashSet.objects.filter(id=self.cash_set.id).update(is_locked=True)
+        self._login_as_user('view_cashregister')
+
+        response = self.client.get(self.report_url)
+
+        self.assertEqual(response.status_code, http.OK)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response.content, b'%PDF stored report')
+        mocked_load.assert_called_once_with(self.cash_set.id)
+
+    @mock.patch('cash_register.views.load_daily_report')
+    def test_stored_daily_report_impossible_without_branch_auth(
+            self, mocked_load):
+        """
+        Stored report shouldn't be served to users without branch access
+        """
+        mocked_load.return_value = b'%PDF stored report'
+        DailyCashSet.objects.filter(id=self.cash_set.id).update(is_locked=True)
+        self._login_as_user('view_cashregister', False)
+
+        response = self.client.get(self.report_url)
+
+        self.assertEqual(response.status_code, http.FORBIDDEN)
+        self.assertFalse(mocked_load.called)
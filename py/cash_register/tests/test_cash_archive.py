@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import httplib as http
+
+from datetime import date as Date
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from model_mommy import mommy
+
+from cash_register.archive import archive_closed_years, archive_deleted_entries
+from cash_register.models import (
+    ArchivedCashEntry,
+    CashEntry,
+    CategoryRollup,
+    DailyCashSet,
+)
+from cash_register.reconciliation import reconcile
+from business.models import Branch
+
+
+class CashEntriesArchiveTestCase(TestCase):
+    """
+    Test Case for moving cash entries between hot and archive tables
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.branch = mommy.make(Branch)
+        self.today = Date(2016, 6, 1)
+        self.cash_sets = [
+            mommy.make(
+                DailyCashSet,
+                branch=self.branch,
+                date=day,
+                balance=Decimal(balance),
+                is_locked=True
+            )
+            for day, balance in (
+                (Date(2015, 12, 30), 10),
+                (Date(2015, 12, 31), 30),
+                (Date(2016, 1, 4), 30),
+            )
+        ]
+        self.entries = [
+            mommy.make(CashEntry, set=cash_set, price=Decimal(price))
+            for cash_set, price in zip(self.cash_sets, (10, 20))
+        ]
+        self.deleted_entry = mommy.make(
+            CashEntry, set=self.cash_sets[2], price=Decimal(5),
+            is_deleted=True
+        )
+
+    def _get_rollups(self):
+        return sorted(CategoryRollup.objects.values_list(
+            'category', 'year', 'month', 'summary_value', 'entries_count'
+        ))
+
+    def test_archive_deleted_entries(self):
+        """
+        Deleted entries should be moved to archive and still be visible
+        to those who see deleted entries
+        """
+        self.assertEqual(archive_deleted_entries(), 1)
+
+        self.assertFalse(
+            CashEntry.all_objects.filter(id=self.deleted_entry.id).exists()
+        )
+        archived = ArchivedCashEntry.objects.get(id=self.deleted_entry.id)
+        self.assertTrue(archived.is_deleted)
+        self.assertEqual(
+            [entry.id for entry in self.cash_sets[2].get_entries(
+                with_deleted=True
+            )],
+            [archived.id]
+        )
+        self.assertEqual(self.cash_sets[2].get_entries(), [])
+
+    def test_archive_closed_years(self):
+        """
+        Entries of passed and fully locked years should be archived without
+        changing balances and rollups
+        """
+        rollups = self._get_rollups()
+
+        self.assertEqual(archive_closed_years(today=self.today), 2)
+
+        self.assertFalse(CashEntry.all_objects.filter(
+            set__date__year=2015
+        ).exists())
+        cash_set = DailyCashSet.objects.get(id=self.cash_sets[1].id)
+        self.assertTrue(cash_set.is_archived)
+        self.assertEqual(
+            [entry.id for entry in cash_set.get_entries()],
+            [self.entries[1].id]
+        )
+        self.assertFalse(
+            DailyCashSet.objects.get(id=self.cash_sets[2].id).is_archived
+        )
+
+        self.assertEqual(reconcile(), [])
+        CategoryRollup.rebuild()
+        self.assertEqual(self._get_rollups(), rollups)
+
+    def test_year_with_unlocked_day_is_not_archived(self):
+        """
+        Year shouldn't be archived while any of its days is unlocked
+        """
+        DailyCashSet.objects.filter(id=self.cash_sets[0].id).update(
+            is_locked=False
+        )
+
+        self.assertEqual(archive_closed_years(today=self.today), 0)
+        self.assertEqual(ArchivedCashEntry.objects.count(), 0)
+
+    def test_unlocking_archived_day_restores_entries(self):
+        """
+        Unlocked day should get its entries back to the hot table
+        """
+        archive_closed_years(today=self.today)
+
+        cash_set = DailyCashSet.objects.get(id=self.cash_sets[0].id)
+        cash_set.is_locked = False
+        cash_set.save()
+
+        self.assertFalse(cash_set.is_archived)
+        self.assertEqual(
+            list(CashEntry.objects.filter(set=cash_set)), [self.entries[0]]
+        )
+        self.assertFalse(
+            ArchivedCashEntry.objects.filter(set=cash_set).exists()
+        )
+
+    def test_archived_day_locked_before_snapshots_keeps_totals(self):
+        """
+        Day locked before totals were frozen should show totals of its
+        archived entries
+        """
+        archive_closed_years(today=self.today)
+
+        cash_set = DailyCashSet.objects.get(id=self.cash_sets[1].id)
+        self.assertEqual(cash_set.closing_balance, Decimal(30))
+        self.assertEqual(cash_set.opening_balance, Decimal(10))
+        self.assertEqual(cash_set.entries_count, 1)
+
+        # Snapshot missing anyway, totals are read from the archive
+        DailyCashSet.objects.filter(id=cash_set.id).update(
+            opening_balance=None,
+            income_total=None,
+            expense_total=None,
+            entries_count=None,
+            closing_balance=None
+        )
+        cash_set = DailyCashSet.objects.get(id=cash_set.id)
+        totals = cash_set.get_totals()
+        self.assertEqual(totals.opening_balance, Decimal(10))
+        self.assertEqual(totals.entries_count, 1)
+
+    def test_confirmations_stay_in_hot_table(self):
+        """
+        Active confirmations of closed year shouldn't be archived, so their
+        documents can still be rendered
+        """
+        confirmation = mommy.make(
+            CashEntry, set=self.cash_sets[0], price=Decimal(0),
+            confirmation=True
+        )
+
+        self.assertEqual(archive_closed_years(today=self.today), 2)
+
+        self.assertTrue(CashEntry.objects.filter(id=confirmation.id).exists())
+        cash_set = DailyCashSet.objects.get(id=self.cash_sets[0].id)
+        self.assertTrue(cash_set.is_archived)
+        self.assertEqual(
+            sorted(entry.id for entry in cash_set.get_entries()),
+            sorted([self.entries[0].id, confirmation.id])
+        )
+
+    def test_archived_day_listed_whole(self):
+        """
+        Entries endpoint and export should list all entries of archived
+        day, both archived ones and confirmations kept in the hot table
+        """
+        confirmation = mommy.make(
+            CashEntry, set=self.cash_sets[0], price=Decimal(0),
+            confirmation=True
+        )
+        archive_closed_years(today=self.today)
+        expected = sorted([
+            self.entries[0].id, self.entries[1].id, confirmation.id
+        ])
+
+        User.objects.create_superuser('admin', '', 'password')
+        self.client.login(username='admin', password='password')
+
+        response = self.client.get(
+            reverse('cash_register_api:entry-list'), {'year': 2015}
+        )
+        self.assertEqual(response.status_code, http.OK)
+        self.assertEqual(
+            sorted(entry['id'] for entry in response.data['results']),
+            expected
+        )
+
+        response = self.client.get(
+            reverse('cash_register_api:entry-export'),
+            {'year': 2015, 'output': 'ndjson'}
+        )
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), len(expected))
+
+    def test_get_entries_fetches_relations(self):
+        """
+        Entries of the day should be fetched with their relations in one
+        query, including deleted and archived ones
+        """
+        archive_deleted_entries()
+        archive_closed_years(today=self.today)
+        for cash_set in DailyCashSet.objects.filter(
+            id__in=[self.cash_sets[0].id, self.cash_sets[2].id]
+        ):
+            for with_deleted in (False, True):
+                with self.assertNumQueries(1):
+                    for entry in cash_set.get_entries(with_deleted):
+                        entry.category.name
+                        entry.created_by.username
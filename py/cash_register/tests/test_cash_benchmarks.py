@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import time
+
+import pytz
+from datetime import date as Date, datetime, timedelta
+from unittest import skipUnless
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from model_mommy import mommy
+
+from cash_register.models import (
+    CashEntry,
+    Category,
+    CategoryRollup,
+    DailyCashSet,
+)
+from business.models import Branch
+
+
+BUDGETS_PATH = os.path.join(
+    os.path.dirname(__file__), 'benchmark_budgets.json'
+)
+
+
+@skipUnless(
+    os.environ.get('CASH_BENCHMARKS'),
+    'Set CASH_BENCHMARKS=1 to run cash register benchmarks'
+)
+class CashRegisterBenchmarkTestCase(TestCase):
+    """
+    Query count and wall time of cash register views on large dataset,
+    checked against budgets from benchmark_budgets.json. Results are saved
+    to CASH_BENCHMARK_OUTPUT file to compare runs with
+    compare_cash_benchmarks command. Run with CASH_BENCHMARK_WRITE_BUDGETS=1
+    to replace budgets with measured query counts and wall times with
+    CASH_BENCHMARK_HEADROOM (0.5 by default) added.
+    """
+    branches_count = int(os.environ.get('CASH_BENCHMARK_BRANCHES', 20))
+    days_count = int(os.environ.get('CASH_BENCHMARK_DAYS', 365))
+    entries_per_day = int(os.environ.get('CASH_BENCHMARK_ENTRIES', 10))
+    repeats = int(os.environ.get('CASH_BENCHMARK_REPEATS', 5))
+    headroom = float(os.environ.get('CASH_BENCHMARK_HEADROOM', 0.5))
+    first_day = Date(2015, 1, 1)
+    results = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        with open(BUDGETS_PATH) as budgets_file:
+            cls.budgets = json.load(budgets_file)['budgets']
+
+        cls.branches = mommy.make(Branch, _quantity=cls.branches_count)
+        cls.categories = {
+            'income': mommy.make(Category, statement='income'),
+            'expense': mommy.make(Category, statement='expense'),
+        }
+        cls.user = User.objects.create_superuser('admin', '', 'password')
+        cls.user.branches.add(*cls.branches)
+        cls.last_day = cls.first_day + timedelta(days=cls.days_count - 1)
+
+        DailyCashSet.objects.bulk_create([
+            DailyCashSet(
+                branch=branch,
+                date=cls.first_day + timedelta(days=day),
+                balance=0,
+                is_locked=day < cls.days_count - 1
+            )
+            for branch in cls.branches
+            for day in range(cls.days_count)
+        ], batch_size=1000)
+
+        for cash_sets in cls._iterate_sets():
+            CashEntry.objects.bulk_create([
+                CashEntry(
+                    set=cash_set,
+                    created_by=cls.user,
+                    created_date=datetime.combine(
+                        cash_set.date, datetime.min.time()
+                    ).replace(minute=number, tzinfo=pytz.utc),
+                    statement='income' if number % 2 else 'expense',
+                    category=cls.categories[
+                        'income' if number % 2 else 'expense'
+                    ],
+                    price=10 if number % 2 else -10
+                )
+                for cash_set in cash_sets
+                for number in range(cls.entries_per_day)
+            ], batch_size=1000)
+        CategoryRollup.rebuild()
+
+    @classmethod
+    def _iterate_sets(cls, chunk_size=100):
+        cash_sets = list(DailyCashSet.objects.order_by('id'))
+        for start in range(0, len(cash_sets), chunk_size):
+            yield cash_sets[start:start + chunk_size]
+
+    @classmethod
+    def tearDownClass(cls):
+        super(CashRegisterBenchmarkTestCase, cls).tearDownClass()
+        output = os.environ.get('CASH_BENCHMARK_OUTPUT')
+        if output:
+            with open(output, 'w') as output_file:
+                json.dump(cls.results, output_file, indent=4, sort_keys=True)
+        if os.environ.get('CASH_BENCHMARK_WRITE_BUDGETS'):
+            cls._write_budgets()
+
+    @classmethod
+    def _write_budgets(cls):
+        with open(BUDGETS_PATH) as budgets_file:
+            budgets = json.load(budgets_file)
+        budgets['dataset'] = {
+            'branches': cls.branches_count,
+            'days': cls.days_count,
+            'entries_per_day': cls.entries_per_day,
+            'repeats': cls.repeats,
+        }
+        budgets['budgets'] = dict(
+            (name, {
+                'queries': result['queries'],
+                'seconds': round(result['seconds'] * (1 + cls.headroom), 4),
+            })
+            for name, result in cls.results.items()
+        )
+        with open(BUDGETS_PATH, 'w') as budgets_file:
+            json.dump(budgets, budgets_file, indent=4, sort_keys=True)
+            budgets_file.write('\n')
+
+    def setUp(self):
+        cache.clear()
+        self.client.login(username='admin', password='password')
+
+    def _get_url(self, page, branch, **kwargs):
+        kwargs.update(
+            branch_id=branch.id,
+            year=self.last_day.year,
+            month=self.last_day.month,
+            day=self.last_day.day,
+        )
+        return reverse('cash_register:{}'.format(page), kwargs=kwargs)
+
+    def _get_entry(self, branch, iteration):
+        return CashEntry.objects.filter(
+            set__branch=branch,
+            set__date=self.last_day
+        ).order_by('id')[iteration]
+
+    def _benchmark(self, name, make_request):
+        timings, queries = [], []
+        for iteration in range(self.repeats):
+            with CaptureQueriesContext(connection) as context:
+                started = time.time()
+                response = make_request(iteration)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                timings.append(time.time() - started)
+            self.assertLess(response.status_code, 400)
+            queries.append(len(context.captured_queries))
+
+        result = {
+            'queries': max(queries),
+            'seconds': sorted(timings)[len(timings) // 2],
+        }
+        self.results[name] = result
+
+        budget = self.budgets.get(name)
+        if budget is None:
+            if os.environ.get('CASH_BENCHMARK_WRITE_BUDGETS'):
+                # Budget is written from results of the current run
+                return
+            self.fail('{} has no budget, measured {}'.format(name, result))
+        self.assertLessEqual(
+            result['queries'], budget['queries'],
+            '{} exceeds query budget: {}'.format(name, result)
+        )
+        self.assertLessEqual(
+            result['seconds'], budget['seconds'],
+            '{} exceeds time budget: {}'.format(name, result)
+        )
+
+    def test_index(self):
+        self._benchmark('index', lambda iteration: self.client.get(
+            self._get_url('index', self.branches[0])
+        ))
+
+    def test_income(self):
+        self._benchmark('income', lambda iteration: self.client.post(
+            self._get_url('income', self.branches[0]),
+            {'price': 100, 'category': self.categories['income'].id}
+        ))
+
+    def test_expense(self):
+        self._benchmark('expense', lambda iteration: self.client.post(
+            self._get_url('expense', self.branches[0]),
+            {'price': -100, 'category': self.categories['expense'].id}
+        ))
+
+    def test_update(self):
+        def update(iteration):
+            cash_entry = self._get_entry(self.branches[0], iteration)
+            return self.client.post(
+                self._get_url('update', self.branches[0], id=cash_entry.id),
+                {
+                    'statement': cash_entry.statement,
+                    'created_by': self.user.id,
+                    'category': cash_entry.category_id,
+                    'price': cash_entry.price * 2,
+                    'note': 'Benchmark',
+                }
+            )
+        self._benchmark('update', update)
+
+    def test_delete(self):
+        def delete(iteration):
+            # Deleted entry is gone from active ones, next one comes first
+            cash_entry = self._get_entry(self.branches[0], 0)
+            return self.client.post(
+                self._get_url('delete', self.branches[0], id=cash_entry.id)
+            )
+        self._benchmark('delete', delete)
+
+    def test_lock(self):
+        def lock(iteration):
+            branch = self.branches[iteration % len(self.branches)]
+            cash_set = DailyCashSet.objects.get(
+                branch=branch, date=self.last_day
+            )
+            return self.client.get(
+                self._get_url('lock', branch, id=cash_set.id)
+            )
+        self._benchmark('lock', lock)
+
+    def test_rest_categories(self):
+        self._benchmark('rest_categories', lambda iteration: self.client.get(
+            reverse('cash_register_api:category-list'),
+            {'year': self.first_day.year}
+        ))
+
+    def test_rest_entries(self):
+        self._benchmark('rest_entries', lambda iteration: self.client.get(
+            reverse('cash_register_api:entry-list'),
+            {'year': self.first_day.year, 'page': iteration + 1}
+        ))
+
+    def test_rest_entries_cursor(self):
+        self._benchmark('rest_entries_cursor', lambda iteration: self.client.get(
+            reverse('cash_register_api:entry-list'),
+            {'year': self.first_day.year, 'cursor': ''}
+        ))
+
+    def test_rest_export(self):
+        self._benchmark('rest_export', lambda iteration: self.client.get(
+            reverse('cash_register_api:entry-export'),
+            {'year': self.first_day.year, 'month': self.first_day.month}
+        ))
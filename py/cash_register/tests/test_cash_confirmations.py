@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import httplib as http
+import mock
+
+from io import BytesIO
+from unittest import skipIf
+from django.contrib.auth.models import User, Permission
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from model_mommy import mommy
+
+from cash_register.confirmations import PdfFileMerger
+from cash_register.models import CashEntry, DailyCashSet
+from business.models import Branch
+
+
+class CashRegisterConfirmationsTestCase(TestCase):
+    """
+    Test Case for batch of KP/KW confirmations
+    """
+
+    def setUp(self):
+        self.branch = mommy.make(Branch)
+        self.url = reverse(
+            'cash_register:pdf_confirmations',
+            kwargs={'branch_id': self.branch.id}
+        )
+
+    def _login_as_user(self, auth_branch=True):
+        user = User.objects.create_user(
+            'test_user', '', 'password'
+        )
+        permission, __ = Permission.objects.get_or_create(
+            codename='view_cashregister'
+        )
+        user.user_permissions.add(permission)
+
+        if auth_branch:
+            # Ensure user has auth branch
+            user.branches.add(self.branch)
+
+        self.client.login(
+            username=user.username,
+            password='password'
+        )
+
+    def test_confirmations_impossible_for_users_without_branch_auth(self):
+        """
+        Check if users without branch auth can't get confirmations
+        """
+        self._login_as_user(auth_branch=False)
+        response = self.client.get(self.url, {'ids': '1'})
+        self.assertEqual(response.status_code, http.FORBIDDEN)
+
+    def test_confirmations_require_dates_or_ids(self):
+        """
+        Confirmations batch needs dates range or list of entries
+        """
+        self._login_as_user()
+        response = self.client.get(self.url, {'date_from': '2015-12-01'})
+        self.assertEqual(response.status_code, http.BAD_REQUEST)
+
+        response = self.client.get(self.url, {'ids': '1,a'})
+        self.assertEqual(response.status_code, http.BAD_REQUEST)
+
+    def test_confirmations_invalid_dates(self):
+        """
+        Malformed, impossible or reversed dates should return bad request
+        """
+        self._login_as_user()
+        for date_from, date_to in (('2015-12', '2015-12-31'),
+                                   ('2015-02-30', '2015-03-01'),
+                                   ('2015-12-31', '2015-12-01')):
+            response = self.client.get(self.url, {
+                'date_from': date_from,
+                'date_to': date_to,
+            })
+            self.assertEqual(response.status_code, http.BAD_REQUEST)
+
+    @mock.patch('cash_register.views.PdfFileMerger', None)
+    def test_confirmations_unavailable_without_pypdf2(self):
+        """
+        Missing PDF merging library should return clear error, not crash
+        """
+        self._login_as_user()
+        response = self.client.get(self.url, {'ids': '1'})
+        self.assertEqual(response.status_code, http.SERVICE_UNAVAILABLE)
+        self.assertIn(b'PyPDF2', response.content)
+
+    def test_confirmations_not_found_without_entries(self):
+        """
+        Empty batch should return not found
+        """
+        self._login_as_user()
+        response = self.client.get(self.url, {
+            'date_from': '2015-12-01',
+            'date_to': '2015-12-31',
+        })
+        self.assertEqual(response.status_code, http.NOT_FOUND)
+
+    @skipIf(PdfFileMerger is None, 'PyPDF2 is not installed')
+    def test_confirmations_merged_into_one_document(self):
+        """
+        Confirmations of all entries should be merged into one PDF
+        """
+        from PyPDF2 import PdfFileReader
+
+        cash_set = mommy.make(DailyCashSet, branch=self.branch)
+        entries = mommy.make(
+            CashEntry, set=cash_set, confirmation=True, _quantity=2
+        )
+        self._login_as_user()
+
+        response = self.client.get(self.url, {
+            'ids': ','.join(str(entry.id) for entry in entries)
+        })
+
+        self.assertEqual(response.status_code, http.OK)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        document = PdfFileReader(BytesIO(b''.join(response.streaming_content)))
+        self.assertGreaterEqual(document.getNumPages(), 2)
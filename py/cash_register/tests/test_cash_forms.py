@@ -10,9 +10,12 @@ from model_mommy import mommy
 from datetime import date as Date, datetime, timedelta
 from django.contrib.auth.models import User, Permission, Group
 
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
 from django.core.urlresolvers import reverse
 from django.test import TestCase
 
+from cash_register.forms import CategoryChoiceField
 from cash_register.models import Category, CashEntry, DailyCashSet
 from business.models import Branch
 from invoices.models import Invoice
@@ -24,6 +27,7 @@ class CashRegisterFormTestCase(TestCase):
     """
 
     def setUp(self):
+        cache.clear()
         self.user = User.objects.create_user(
             'test_user', '', 'password'
         )
@@ -510,3 +514,47 @@ class CashRegisterUpdateEntryTestCase(CashRegisterFormTestCase):
         entry = CashEntry.objects.get(id=self.cash_entry.id)
         self.assertEqual(entry.price, 100)
         self.assertEqual(entry.note, 'New note')
+
+
+class CashCategoryChoiceFieldTestCase(TestCase):
+    """
+    Test Case for category choices taken from categories cache
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.category_income = mommy.make(Category, statement='income')
+        self.category_expense = mommy.make(Category, statement='expense')
+
+    def test_choices_and_cleaning_dont_query_categories(self):
+        """
+        Check if loaded categories are reused for choices and validation
+        """
+        CategoryChoiceField('income').choices
+
+        field = CategoryChoiceField('income')
+        with self.assertNumQueries(0):
+            choices = list(field.choices)
+            category = field.clean(str(self.category_income.id))
+
+        self.assertEqual(choices[1][0], self.category_income.id)
+        self.assertEqual(category, self.category_income)
+
+    def test_other_statement_category_is_invalid(self):
+        """
+        Check if category of another statement is not valid choice
+        """
+        field = CategoryChoiceField('income')
+        with self.assertRaises(ValidationError):
+            field.clean(str(self.category_expense.id))
+
+    def test_changed_category_reloads_choices(self):
+        """
+        Check if category change invalidates cached categories
+        """
+        CategoryChoiceField('income').choices
+        self.category_income.name = 'Changed name'
+        self.category_income.save()
+
+        choices = list(CategoryChoiceField('income').choices)
+        self.assertEqual(choices[1][1], 'Changed name')
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from model_mommy import mommy
+
+from cash_register.importer import import_entries
+from cash_register.models import (
+    CashEntry,
+    Category,
+    CategoryRollup,
+    DailyCashSet,
+)
+from business.models import Branch
+
+
+class CashEntriesImportTestCase(TestCase):
+    """
+    Test Case for bulk import of cash entries
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser('admin', '', 'password')
+        self.branch = mommy.make(Branch)
+        self.user.branches.add(self.branch)
+        self.category = mommy.make(Category, statement='income')
+
+    def _entry_data(self, **kwargs):
+        data = {
+            'branch': self.branch.id,
+            'date': '2015-12-25',
+            'created_by': self.user.id,
+            'statement': 'income',
+            'category': self.category.id,
+            'price': '10.00',
+            'confirmation': True,
+        }
+        data.update(kwargs)
+        return data
+
+    def test_import_entries(self):
+        """
+        Import should create entries, one cash set and update its balance
+        """
+        entries, errors = import_entries([
+            self._entry_data(),
+            self._entry_data(price='15.00'),
+        ], self.user)
+
+        self.assertEqual(errors, {})
+        self.assertEqual(len(entries), 2)
+
+        cash_set = DailyCashSet.objects.get(branch=self.branch)
+        self.assertEqual(cash_set.balance, Decimal(25))
+        self.assertEqual(
+            sorted(CashEntry.objects.filter(set=cash_set).values_list(
+                'confirmation_id', flat=True
+            )),
+            ['KP/15/0001', 'KP/15/0002']
+        )
+
+        rollup = CategoryRollup.objects.get(category=self.category)
+        self.assertEqual(rollup.summary_value, Decimal(25))
+        self.assertEqual(rollup.entries_count, 2)
+
+    def test_import_nothing_when_entry_invalid(self):
+        """
+        Import should skip all entries when any of them is invalid
+        """
+        entries, errors = import_entries([
+            self._entry_data(),
+            self._entry_data(price='-15.00'),
+        ], self.user)
+
+        self.assertEqual(entries, [])
+        self.assertEqual(list(errors), [1])
+        self.assertFalse(CashEntry.objects.exists())
+
+    def test_import_nothing_into_locked_set(self):
+        """
+        Import shouldn't add entries to locked cash set
+        """
+        mommy.make(
+            DailyCashSet,
+            branch=self.branch,
+            date='2015-12-25',
+            is_locked=True
+        )
+        entries, errors = import_entries([self._entry_data()], self.user)
+
+        self.assertEqual(entries, [])
+        self.assertEqual(list(errors), [0])
+        self.assertFalse(CashEntry.objects.exists())
+
+    def test_import_keeps_balance_chain(self):
+        """
+        Import into a backdated open day should carry its balance forward
+        to all later days
+        """
+        for day, is_locked in (('2015-12-20', True), ('2015-12-22', False),
+                               ('2015-12-24', False)):
+            mommy.make(
+                DailyCashSet,
+                branch=self.branch,
+                date=day,
+                balance=Decimal(100),
+                is_locked=is_locked
+            )
+
+        entries, errors = import_entries([
+            self._entry_data(date='2015-12-24', price='5.00'),
+            self._entry_data(date='2015-12-22', price='10.00'),
+        ], self.user)
+        self.assertEqual(errors, {})
+
+        balances = dict(DailyCashSet.objects.filter(
+            branch=self.branch
+        ).values_list('date', 'balance'))
+        self.assertEqual(
+            [balances[day] for day in sorted(balances)],
+            [Decimal(100), Decimal(110), Decimal(115)]
+        )
+
+    def test_import_opens_days_after_locked_set(self):
+        """
+        Import after the latest locked day should open new days, each one
+        with balance of the day before it
+        """
+        mommy.make(
+            DailyCashSet,
+            branch=self.branch,
+            date='2015-12-24',
+            balance=Decimal(100),
+            is_locked=True
+        )
+
+        entries, errors = import_entries([
+            self._entry_data(date='2015-12-27', price='5.00'),
+            self._entry_data(date='2015-12-26', price='20.00'),
+        ], self.user)
+        self.assertEqual(errors, {})
+
+        balances = dict(DailyCashSet.objects.filter(
+            branch=self.branch
+        ).values_list('date', 'balance'))
+        self.assertEqual(
+            [balances[day] for day in sorted(balances)],
+            [Decimal(100), Decimal(120), Decimal(125)]
+        )
+
+    def test_import_nothing_outside_open_days(self):
+        """
+        Import should follow cash register date rules, no new day after
+        an open one and no new day between existing ones
+        """
+        for day, is_locked in (('2015-12-20', True), ('2015-12-24', False)):
+            mommy.make(
+                DailyCashSet,
+                branch=self.branch,
+                date=day,
+                is_locked=is_locked
+            )
+
+        entries, errors = import_entries([
+            self._entry_data(date='2015-12-24'),
+            self._entry_data(date='2015-12-26'),
+            self._entry_data(date='2015-12-22'),
+            self._entry_data(date='2015-12-18'),
+        ], self.user)
+
+        self.assertEqual(entries, [])
+        self.assertEqual(sorted(errors), [1, 2, 3])
+        self.assertEqual(DailyCashSet.objects.count(), 2)
+
+    def test_import_nothing_into_unauthorized_branch(self):
+        """
+        Import should reject entries of branches user has no access to
+        """
+        clerk = User.objects.create_user('clerk', '', 'password')
+
+        entries, errors = import_entries([self._entry_data()], clerk)
+
+        self.assertEqual(entries, [])
+        self.assertEqual(list(errors[0]), ['branch'])
+        self.assertFalse(DailyCashSet.objects.exists())
+
+    def test_non_object_entry_reported_by_index(self):
+        """
+        List element which isn't an object should be reported by its index
+        """
+        entries, errors = import_entries(
+            [self._entry_data(), 'entry', None], self.user
+        )
+
+        self.assertEqual(entries, [])
+        self.assertEqual(sorted(errors), [1, 2])
+        self.assertFalse(CashEntry.objects.exists())
+
+    def test_import_nothing_before_locked_set(self):
+        """
+        Import shouldn't change balances of later locked cash set
+        """
+        mommy.make(
+            DailyCashSet,
+            branch=self.branch,
+            date='2015-12-28',
+            is_locked=True
+        )
+        entries, errors = import_entries([self._entry_data()], self.user)
+
+        self.assertEqual(entries, [])
+        self.assertEqual(list(errors), [0])
+        self.assertEqual(DailyCashSet.objects.count(), 1)
+
+    def test_confirmation_year_of_imported_day(self):
+        """
+        Confirmation number should use the year of the imported day
+        """
+        entries, errors = import_entries([
+            self._entry_data(date='2013-06-01'),
+        ], self.user)
+
+        self.assertEqual(errors, {})
+        self.assertEqual(entries[0].created_date.year, 2013)
+        self.assertEqual(entries[0].confirmation_id, 'KP/13/0001')
@@ -5,6 +5,7 @@ import httplib as http
 
 from datetime import date as Date, timedelta
 from django.contrib.auth.models import User, Permission, Group
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.test import TestCase
 
@@ -20,6 +21,7 @@ class CashRegisterIndexTestCase(TestCase):
     """
 
     def setUp(self):
+        cache.clear()
         self.branch = mommy.make(Branch)
         self.example_date = Date(2015, 12, 25)
         params = dict(
@@ -32,9 +34,9 @@ class CashRegisterIndexTestCase(TestCase):
         self.index_url = reverse('cash_register:index', kwargs=params)
 
     def _login_as_user(self, with_permissions=True, auth_branch=True,
-                       is_superuser=False):
+                       is_superuser=False, username='test_user'):
         user = User.objects.create_user(
-            'test_user', '', 'password'
+            username, '', 'password'
         )
         if with_permissions:
             permission, __ = Permission.objects.get_or_create(
@@ -81,6 +83,18 @@ class CashRegisterIndexTestCase(TestCase):
         response = self.client.get(self.index_url)
         self.assertEqual(response.status_code, http.FORBIDDEN)
 
+    def test_index_page_visible_after_branch_auth_granted(self):
+        """
+        Cached user branches should be refreshed when user gets branch auth
+        """
+        self._login_as_user(auth_branch=False)
+        response = self.client.get(self.index_url)
+        self.assertEqual(response.status_code, http.FORBIDDEN)
+
+        User.objects.get(username='test_user').branches.add(self.branch)
+        response = self.client.get(self.index_url)
+        self.assertEqual(response.status_code, http.OK)
+
     def test_index_page_available_for_users_with_permission(self):
         """
         Check if users with proper permission can see the content
@@ -193,3 +207,77 @@ class CashRegisterIndexTestCase(TestCase):
         bad_index_url = reverse('cash_register:index', kwargs=params)
         response = self.client.get(bad_index_url)
         self.assertEqual(response.status_code, http.NOT_FOUND)
+
+    def test_index_page_not_modified(self):
+        """
+        Index page should return not modified for current ETag
+        and be refreshed when entries of the day change
+        """
+        cash_set = mommy.make(
+            DailyCashSet,
+            date=self.example_date,
+            branch=self.branch
+        )
+        self._login_as_user()
+
+        response = self.client.get(self.index_url)
+        self.assertEqual(response.status_code, http.OK)
+        etag = response['ETag']
+
+        response = self.client.get(self.index_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, http.NOT_MODIFIED)
+
+        mommy.make(CashEntry, set=cash_set)
+        response = self.client.get(self.index_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, http.OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_index_page_cached_for_locked_set(self):
+        """
+        Locked day page should be rendered once and invalidated
+        when any of its entries changes
+        """
+        cash_set = mommy.make(
+            DailyCashSet,
+            date=self.example_date,
+            branch=self.branch,
+            is_locked=True
+        )
+        cash_entry = mommy.make(CashEntry, set=cash_set)
+        self._login_as_user()
+
+        response = self.client.get(self.index_url)
+        self.assertEqual(response.status_code, http.OK)
+        self.assertEqual(len(response.context_data['entries']), 1)
+
+        response = self.client.get(self.index_url)
+        self.assertEqual(response.status_code, http.OK)
+        self.assertIsNone(getattr(response, 'context_data', None))
+
+        cash_entry.delete()
+        response = self.client.get(self.index_url)
+        self.assertEqual(len(response.context_data['entries']), 0)
+
+    def test_index_page_cache_not_shared_between_users(self):
+        """
+        Locked day page cached for one user shouldn't be served to another
+        one, cached page should keep response headers
+        """
+        mommy.make(
+            DailyCashSet,
+            date=self.example_date,
+            branch=self.branch,
+            is_locked=True
+        )
+        self._login_as_user()
+        rendered = self.client.get(self.index_url)
+        cached = self.client.get(self.index_url)
+        self.assertIsNone(getattr(cached, 'context_data', None))
+        for header in ('Content-Type', 'ETag', 'Last-Modified'):
+            self.assertEqual(cached[header], rendered[header])
+
+        self.client.logout()
+        self._login_as_user(username='other_user')
+        response = self.client.get(self.index_url)
+        self.assertEqual(response.status_code, http.OK)
+        self.assertIsNotNone(response.context_data)
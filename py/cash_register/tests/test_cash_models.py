@@ -2,14 +2,29 @@
 # -*- coding: utf-8 -*-
 
 import mock
+import os
 import pytz
+import threading
+import time
 
 from decimal import Decimal
 from datetime import datetime, date
-from unittest import TestCase
+from unittest import TestCase, skipUnless
+from django.db import connection
+from django.test import TransactionTestCase
 from model_mommy import mommy
 
-from cash_register.models import CashEntry, DailyCashSet
+from django.contrib.auth.models import User
+
+from cash_register.models import (
+    CashEntry,
+    Category,
+    CashSetState,
+    CashSetTotals,
+    CategoryRollup,
+    ConfirmationCounter,
+    DailyCashSet,
+)
 from business.models import Branch
 
 
@@ -27,6 +42,79 @@ class DailyCashSetModelsTestCase(TestCase):
         cash_set_new = DailyCashSet.objects.get(id=cash_set.id)
         self.assertTrue(cash_set_new.is_locked)
 
+    def test_close_cash_sets(self):
+        """
+        Close should lock cash sets and freeze their totals
+        """
+        cash_sets = mommy.make(DailyCashSet, balance=Decimal(130), _quantity=2)
+        mommy.make(
+            CashEntry, set=cash_sets[0], statement='income',
+            price=Decimal(50), _quantity=2
+        )
+        mommy.make(
+            CashEntry, set=cash_sets[0], statement='expense',
+            price=Decimal(-20)
+        )
+
+        closed = DailyCashSet.close(DailyCashSet.objects.filter(
+            id__in=[cash_set.id for cash_set in cash_sets]
+        ))
+        self.assertEqual(closed, 2)
+
+        cash_set = DailyCashSet.objects.get(id=cash_sets[0].id)
+        self.assertTrue(cash_set.is_locked)
+        self.assertEqual(cash_set.get_totals(), CashSetTotals(
+            opening_balance=Decimal(50),
+            income_total=Decimal(100),
+            expense_total=Decimal(-20),
+            entries_count=3,
+            closing_balance=Decimal(130)
+        ))
+
+        cash_set = DailyCashSet.objects.get(id=cash_sets[1].id)
+        self.assertTrue(cash_set.is_locked)
+        self.assertEqual(cash_set.opening_balance, Decimal(130))
+        self.assertEqual(cash_set.entries_count, 0)
+
+    @mock.patch('cash_register.models.delete_daily_report')
+    def test_unlock_deletes_stored_report(self, mocked_delete):
+        """
+        Unlocking cash set should delete its stored daily report
+        """
+        cash_set = mommy.make(DailyCashSet, is_locked=True)
+        cash_set = DailyCashSet.objects.get(id=cash_set.id)
+
+        cash_set.save()
+        self.assertFalse(mocked_delete.called)
+
+        cash_set.is_locked = False
+        cash_set.save()
+        mocked_delete.assert_called_once_with(cash_set.id)
+
+    def test_unlocked_cash_set_totals_follow_entries(self):
+        """
+        Totals of unlocked cash set should reflect entries edited after unlock
+        """
+        cash_set = mommy.make(DailyCashSet, balance=Decimal(50))
+        cash_set.lock()
+        self.assertEqual(cash_set.get_totals().closing_balance, Decimal(50))
+
+        cash_set.is_locked = False
+        cash_set.save()
+        cash_set.update(mommy.prepare(
+            CashEntry, statement='income', price=Decimal(30)
+        ))
+
+        cash_set = DailyCashSet.objects.get(id=cash_set.id)
+        self.assertIsNone(cash_set.closing_balance)
+        self.assertEqual(cash_set.get_totals(), CashSetTotals(
+            opening_balance=Decimal(50),
+            income_total=Decimal(30),
+            expense_total=Decimal(0),
+            entries_count=1,
+            closing_balance=Decimal(80)
+        ))
+
     def test_update_cash_set(self):
         """
         Update cash set should set set and change balance from entry
@@ -36,6 +124,54 @@ class DailyCashSetModelsTestCase(TestCase):
         cash_set.update(cash_entry)
         self.assertEqual(cash_entry.set, cash_set)
 
+    def test_update_cash_set_applies_delta(self):
+        """
+        Update cash set should add entry price to balance stored in database
+        """
+        cash_set = mommy.make(DailyCashSet, balance=Decimal(100))
+        cash_entry = mommy.prepare(CashEntry, price=Decimal(25))
+
+        # Simulate other writer changing balance in the meantime
+        DailyCashSet.objects.filter(id=cash_set.id).update(
+            balance=Decimal(150)
+        )
+        cash_set.update(cash_entry)
+
+        self.assertEqual(cash_set.balance, Decimal(175))
+        cash_set_new = DailyCashSet.objects.get(id=cash_set.id)
+        self.assertEqual(cash_set_new.balance, Decimal(175))
+
+    def test_concurrent_delete_applies_delta_once(self):
+        """
+        Entry deleted by two writers at once should be subtracted once
+        """
+        cash_set = mommy.make(DailyCashSet, balance=Decimal(100))
+        cash_entry = mommy.make(CashEntry, set=cash_set, price=Decimal(10))
+        # Both writers loaded the entry before any of them deleted it
+        first = CashEntry.objects.get(id=cash_entry.id)
+        second = CashEntry.objects.get(id=cash_entry.id)
+
+        first.delete()
+        second.delete()
+
+        self.assertEqual(
+            DailyCashSet.objects.get(id=cash_set.id).balance, Decimal(90)
+        )
+
+    def test_refresh_for_update_returns_stored_entry(self):
+        """
+        Changes should be computed from entry price stored in database,
+        not the one loaded before other writer changed it
+        """
+        cash_entry = mommy.make(CashEntry, price=Decimal(10))
+        CashEntry.objects.filter(id=cash_entry.id).update(price=Decimal(20))
+
+        cash_entry.price = Decimal(30)
+        stored = cash_entry.refresh_for_update()
+
+        self.assertEqual(stored.price, Decimal(20))
+        self.assertEqual(cash_entry.price, Decimal(30))
+
     def test_save_cash_set_balance(self):
         """
         Save cash set should save proper balance
@@ -58,6 +194,131 @@ class DailyCashSetModelsTestCase(TestCase):
         )
         self.assertEqual(next_cash_set.balance, Decimal(1500))
 
+    def test_open_day(self):
+        """
+        Open day should create sets carrying balances of locked latest sets
+        """
+        branches = mommy.make(Branch, _quantity=4)
+        mommy.make(
+            DailyCashSet, branch=branches[0], date=date(2015, 12, 27),
+            balance=Decimal(100), is_locked=True
+        )
+        mommy.make(
+            DailyCashSet, branch=branches[0], date=date(2015, 12, 20),
+            balance=Decimal(50), is_locked=True
+        )
+        mommy.make(
+            DailyCashSet, branch=branches[1], date=date(2015, 12, 27),
+            is_locked=False
+        )
+        mommy.make(
+            DailyCashSet, branch=branches[2], date=date(2015, 12, 28)
+        )
+
+        cash_sets, skipped = DailyCashSet.open_day(
+            date(2015, 12, 28),
+            [branch.id for branch in branches]
+        )
+
+        self.assertEqual(
+            sorted(cash_set.branch_id for cash_set in cash_sets),
+            [branches[0].id, branches[3].id]
+        )
+        self.assertEqual(skipped, [branches[1].id])
+        self.assertEqual(
+            DailyCashSet.objects.get(
+                branch=branches[0], date=date(2015, 12, 28)
+            ).balance,
+            Decimal(100)
+        )
+        self.assertEqual(
+            DailyCashSet.objects.get(
+                branch=branches[3], date=date(2015, 12, 28)
+            ).balance,
+            Decimal(0)
+        )
+
+    def test_open_day_opened_concurrently(self):
+        """
+        Set opened by concurrent request should be left as it is
+        """
+        branches = mommy.make(Branch, _quantity=2)
+        raw = DailyCashSet.objects.raw
+
+        def open_concurrently(*args, **kwargs):
+            mommy.make(
+                DailyCashSet, branch=branches[0], date=date(2015, 12, 28),
+                balance=Decimal(10)
+            )
+            return raw(*args, **kwargs)
+
+        with mock.patch.object(
+                DailyCashSet.objects, 'raw', side_effect=open_concurrently):
+            cash_sets, skipped = DailyCashSet.open_day(
+                date(2015, 12, 28),
+                [branch.id for branch in branches]
+            )
+
+        self.assertEqual(
+            [cash_set.branch_id for cash_set in cash_sets], [branches[1].id]
+        )
+        self.assertEqual(
+            DailyCashSet.objects.get(branch=branches[0]).balance, Decimal(10)
+        )
+
+    def test_adjacent_dates(self):
+        """
+        Previous and next dates should skip days without cash sets
+        """
+        branch = mommy.make(Branch)
+        for day in (date(2015, 12, 24), date(2015, 12, 28), date(2016, 1, 4)):
+            mommy.make(DailyCashSet, branch=branch, date=day)
+
+        self.assertEqual(
+            DailyCashSet.get_previous_date(branch.id, date(2015, 12, 28)),
+            date(2015, 12, 24)
+        )
+        self.assertEqual(
+            DailyCashSet.get_next_date(branch.id, date(2015, 12, 25)),
+            date(2015, 12, 28)
+        )
+        self.assertIsNone(
+            DailyCashSet.get_previous_date(branch.id, date(2015, 12, 24))
+        )
+        self.assertIsNone(
+            DailyCashSet.get_next_date(branch.id, date(2016, 1, 4))
+        )
+        self.assertEqual(
+            DailyCashSet.get_month_dates(branch.id, 2015, 12),
+            [date(2015, 12, 24), date(2015, 12, 28)]
+        )
+
+        mommy.make(DailyCashSet, branch=branch, date=date(2015, 12, 31))
+        self.assertEqual(
+            DailyCashSet.get_next_date(branch.id, date(2015, 12, 28)),
+            date(2015, 12, 31)
+        )
+
+    def test_register_state_invalidated_by_lock(self):
+        """
+        Register state should be cached and refreshed when cash set changes
+        """
+        cash_set = mommy.make(DailyCashSet, date=date(2015, 12, 28))
+        mommy.make(
+            DailyCashSet,
+            branch=cash_set.branch,
+            date=date(2015, 12, 27),
+            is_locked=True
+        )
+
+        earliest, latest = DailyCashSet.get_register_state(cash_set.branch_id)
+        self.assertEqual(earliest, CashSetState(date(2015, 12, 27), True))
+        self.assertEqual(latest, CashSetState(date(2015, 12, 28), False))
+
+        cash_set.lock()
+        earliest, latest = DailyCashSet.get_register_state(cash_set.branch_id)
+        self.assertEqual(latest, CashSetState(date(2015, 12, 28), True))
+
 
 class CashEntryModelsTestCase(TestCase):
     """
@@ -189,3 +450,172 @@ class CashEntryModelsTestCase(TestCase):
         ]
         self.assertEqual(cash_entries[0].confirmation_id, 'KW/15/0001')
         self.assertEqual(cash_entries[1].confirmation_id, 'KW/15/0001')
+
+    def test_set_confirmation_ids_in_bulk(self):
+        """
+        Bulk allocation should continue numbers from single saves
+        """
+        branch = mommy.make(Branch)
+        cash_set = mommy.make(DailyCashSet, branch=branch)
+        mommy.make(
+            CashEntry,
+            set=cash_set,
+            confirmation=True,
+            statement='income',
+            created_date=datetime(2015, 12, 28),
+        )
+
+        cash_entries = mommy.prepare(
+            CashEntry,
+            set=cash_set,
+            confirmation=True,
+            statement='income',
+            created_date=datetime(2015, 12, 29),
+            _quantity=3
+        )
+        CashEntry.set_confirmation_ids(cash_entries)
+
+        self.assertEqual(
+            [entry.confirmation_id for entry in cash_entries],
+            ['KP/15/0002', 'KP/15/0003', 'KP/15/0004']
+        )
+        counter = ConfirmationCounter.objects.get(
+            branch=branch, statement='income', year=2015
+        )
+        self.assertEqual(counter.last_number, 4)
+
+
+class CategoryRollupModelsTestCase(TestCase):
+    """
+    Test Case for monthly category rollups maintenance
+    """
+
+    def setUp(self):
+        self.cash_set = mommy.make(DailyCashSet, date=date(2015, 12, 28))
+        self.category = mommy.make(Category, statement='income')
+
+    def _get_rollup(self):
+        return CategoryRollup.objects.get(
+            branch=self.cash_set.branch,
+            category=self.category,
+            year=2015,
+            month=12
+        )
+
+    def test_rollup_follows_entry_changes(self):
+        """
+        Saving, updating and deleting entries should keep rollup up to date
+        """
+        cash_entries = mommy.make(
+            CashEntry,
+            set=self.cash_set,
+            category=self.category,
+            statement='income',
+            price=Decimal(10),
+            _quantity=2
+        )
+        rollup = self._get_rollup()
+        self.assertEqual(rollup.summary_value, Decimal(20))
+        self.assertEqual(rollup.entries_count, 2)
+
+        cash_entries[0].price = Decimal(15)
+        cash_entries[0].save(update_fields=['price'])
+        rollup = self._get_rollup()
+        self.assertEqual(rollup.summary_value, Decimal(25))
+        self.assertEqual(rollup.entries_count, 2)
+
+        cash_entries[1].delete()
+        rollup = self._get_rollup()
+        self.assertEqual(rollup.summary_value, Decimal(15))
+        self.assertEqual(rollup.entries_count, 1)
+
+    def test_rebuild_rollups(self):
+        """
+        Rebuild should repair broken rollups
+        """
+        mommy.make(
+            CashEntry,
+            set=self.cash_set,
+            category=self.category,
+            statement='income',
+            price=Decimal(10),
+            _quantity=3
+        )
+        CategoryRollup.objects.update(summary_value=0, entries_count=0)
+
+        CategoryRollup.rebuild()
+
+        rollup = self._get_rollup()
+        self.assertEqual(rollup.summary_value, Decimal(30))
+        self.assertEqual(rollup.entries_count, 3)
+
+
+@skipUnless(
+    connection.features.has_select_for_update,
+    "Database backend doesn't support concurrent writers"
+)
+class DailyCashSetConcurrencyTestCase(TransactionTestCase):
+    """
+    Test Case for posting cash entries by many tellers at once
+    """
+    writers = 8
+    entries_per_writer = 25
+    # Lowest accepted throughput of parallel posting, entries per second
+    min_throughput = float(os.environ.get('CASH_MIN_THROUGHPUT', 20))
+
+    def _post_entries(self, cash_set_id, errors):
+        try:
+            for __ in range(self.entries_per_writer):
+                cash_set = DailyCashSet.objects.get(id=cash_set_id)
+                cash_entry = mommy.prepare(
+                    CashEntry,
+                    category=self.category,
+                    created_by=self.user,
+                    price=Decimal(10)
+                )
+                cash_set.update(cash_entry)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    def test_concurrent_updates_keep_balance(self):
+        """
+        Concurrent updates of one cash set shouldn't lose any balance change
+        """
+        cash_set = mommy.make(DailyCashSet, balance=Decimal(0))
+        self.category = mommy.make(Category)
+        self.user = mommy.make(User)
+        errors = []
+
+        threads = [
+            threading.Thread(
+                target=self._post_entries,
+                args=(cash_set.id, errors)
+            )
+            for __ in range(self.writers)
+        ]
+        started = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - started
+
+        total = self.writers * self.entries_per_writer
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            DailyCashSet.objects.get(id=cash_set.id).balance,
+            Decimal(10 * total)
+        )
+        self.assertEqual(CashEntry.objects.filter(set=cash_set).count(), total)
+
+        # Throughput of parallel posting, entries per second
+        throughput = total / elapsed
+        self.assertGreaterEqual(
+            throughput, self.min_throughput,
+            'Posted {} entries by {} writers at {:.1f} entries/s, below '
+            'budget of {} entries/s'.format(
+                total, self.writers, throughput, self.min_throughput
+            )
+        )
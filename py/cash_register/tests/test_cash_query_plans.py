@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import date as Date, datetime, timedelta
+from unittest import skipUnless
+
+import pytz
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from model_mommy import mommy
+
+from cash_register.models import (
+    CashEntry,
+    Category,
+    CategoryRollup,
+    ConfirmationCounter,
+    DailyCashSet,
+)
+from business.models import Branch
+
+
+@skipUnless(
+    connection.vendor in ('sqlite', 'postgresql'),
+    "Query plans are checked only for SQLite and PostgreSQL"
+)
+class CashQueryPlansTestCase(TestCase):
+    """
+    Test Case for query plans of hot cash register lookups
+    """
+    branches_count = 10
+    days_count = 120
+    entries_per_day = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.branches = mommy.make(Branch, _quantity=cls.branches_count)
+        cls.category = mommy.make(Category, statement='income')
+        cls.user = mommy.make(User)
+        first_day = Date(2015, 1, 1)
+
+        DailyCashSet.objects.bulk_create([
+            DailyCashSet(
+                branch=branch,
+                date=first_day + timedelta(days=day),
+                balance=0,
+                is_locked=True
+            )
+            for branch in cls.branches
+            for day in range(cls.days_count)
+        ])
+
+        CashEntry.objects.bulk_create([
+            CashEntry(
+                set=cash_set,
+                created_by=cls.user,
+                created_date=datetime.combine(
+                    cash_set.date, datetime.min.time()
+                ).replace(hour=number, tzinfo=pytz.utc),
+                statement='income',
+                category=cls.category,
+                price=10
+            )
+            for cash_set in DailyCashSet.objects.all()
+            for number in range(cls.entries_per_day)
+        ])
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        cls.branch = cls.branches[0]
+        cls.cash_set = DailyCashSet.objects.filter(branch=cls.branch).first()
+
+    def _get_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        explain = (
+            'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite'
+            else 'EXPLAIN '
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(explain + sql, params)
+            return '\n'.join(
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            )
+
+    def assertNoFullScan(self, queryset):
+        plan = self._get_plan(queryset)
+        for line in plan.splitlines():
+            if connection.vendor == 'sqlite':
+                is_full_scan = 'SCAN' in line and 'USING' not in line
+            else:
+                is_full_scan = 'Seq Scan' in line
+            self.assertFalse(
+                is_full_scan and 'cash_register_' in line,
+                'Full scan in query plan:\n{}'.format(plan)
+            )
+
+    def test_cash_set_by_branch_and_date(self):
+        self.assertNoFullScan(DailyCashSet.objects.filter(
+            branch=self.branch,
+            date=self.cash_set.date
+        ))
+
+    def test_earliest_and_latest_cash_set(self):
+        cash_sets = DailyCashSet.objects.filter(branch=self.branch)
+        self.assertNoFullScan(cash_sets.order_by('date')[:1])
+        self.assertNoFullScan(cash_sets.order_by('-date')[:1])
+
+    def test_cash_entries_of_set(self):
+        self.assertNoFullScan(CashEntry.objects.filter(set=self.cash_set))
+
+    def test_confirmation_counter(self):
+        self.assertNoFullScan(ConfirmationCounter.objects.filter(
+            branch=self.branch,
+            statement='income',
+            year=2015
+        ))
+
+    def test_category_rollup(self):
+        self.assertNoFullScan(CategoryRollup.objects.filter(
+            branch=self.branch,
+            category=self.category,
+            statement='income',
+            year=2015,
+            month=1
+        ))
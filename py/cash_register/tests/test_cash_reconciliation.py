@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from datetime import date as Date
+from decimal import Decimal
+from unittest import skipIf
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase
+from model_mommy import mommy
+
+from cash_register.models import CashEntry, DailyCashSet
+from cash_register.reconciliation import reconcile
+from business.models import Branch
+
+
+class CashBalancesReconciliationMixin(object):
+    """
+    Tests of recomputing cash sets balance chains
+    """
+    workers = 1
+
+    def setUp(self):
+        self.branch = mommy.make(Branch)
+        self.cash_sets = [
+            mommy.make(
+                DailyCashSet,
+                branch=self.branch,
+                date=Date(2015, 12, day),
+                balance=Decimal(balance)
+            )
+            for day, balance in ((27, 10), (28, 30), (29, 30))
+        ]
+        for cash_set, price in zip(self.cash_sets, (10, 20)):
+            mommy.make(CashEntry, set=cash_set, price=Decimal(price))
+
+    def _reconcile(self, fix=False):
+        return reconcile(
+            branch_ids=[self.branch.id], workers=self.workers, fix=fix
+        )
+
+    def test_reconcile_consistent_chain(self):
+        """
+        Consistent balances shouldn't be reported
+        """
+        self.assertEqual(self._reconcile(), [])
+
+    def test_reconcile_broken_chain(self):
+        """
+        Wrong balance should be reported and repaired on demand
+        """
+        DailyCashSet.objects.filter(id=self.cash_sets[1].id).update(
+            balance=Decimal(100)
+        )
+
+        differences = self._reconcile()
+        self.assertEqual(len(differences), 1)
+        self.assertEqual(differences[0].set_id, self.cash_sets[1].id)
+        self.assertEqual(differences[0].stored, Decimal(100))
+        self.assertEqual(differences[0].expected, Decimal(30))
+
+        self._reconcile(fix=True)
+        self.assertEqual(self._reconcile(), [])
+        self.assertEqual(
+            DailyCashSet.objects.get(id=self.cash_sets[1].id).balance,
+            Decimal(30)
+        )
+
+    def test_reconcile_chain_with_opening_balance(self):
+        """
+        Chain starting with non zero balance shouldn't be reported
+        """
+        DailyCashSet.objects.filter(branch=self.branch).update(
+            balance=F('balance') + 500
+        )
+
+        self.assertEqual(self._reconcile(), [])
+
+    def test_repair_updates_locked_day_snapshot(self):
+        """
+        Repaired locked day should get frozen totals of the new balance
+        """
+        DailyCashSet.close(DailyCashSet.objects.filter(
+            id=self.cash_sets[1].id
+        ))
+        DailyCashSet.objects.filter(id=self.cash_sets[1].id).update(
+            balance=Decimal(100),
+            opening_balance=Decimal(80),
+            closing_balance=Decimal(100)
+        )
+
+        self._reconcile(fix=True)
+
+        cash_set = DailyCashSet.objects.get(id=self.cash_sets[1].id)
+        self.assertEqual(cash_set.balance, Decimal(30))
+        self.assertEqual(cash_set.closing_balance, Decimal(30))
+        self.assertEqual(cash_set.opening_balance, Decimal(10))
+
+
+class CashBalancesReconciliationTestCase(CashBalancesReconciliationMixin,
+                                         TestCase):
+    """
+    Test Case for recomputing cash sets balance chains
+    """
+
+
+@skipIf(
+    connection.vendor == 'sqlite',
+    "Worker processes can't share in-memory SQLite test database"
+)
+class CashBalancesParallelReconciliationTestCase(
+        CashBalancesReconciliationMixin, TransactionTestCase):
+    """
+    Test Case for reconciling branches in worker processes
+    """
+    workers = 2
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import httplib as http
+import json
+import pytz
+
+from datetime import date as Date, datetime
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from model_mommy import mommy
+
+from cash_register.models import CashEntry, Category, DailyCashSet
+
+
+class CashCategoryViewSetTestCase(TestCase):
+    """
+    Test Case for cash categories summary endpoint
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('cash_register_api:category-list')
+        self.cash_set = mommy.make(DailyCashSet, date=Date(2015, 12, 25))
+        self.category = mommy.make(Category, statement='income')
+
+        User.objects.create_superuser('admin', '', 'password')
+        self.client.login(username='admin', password='password')
+
+    def test_categories_summary(self):
+        """
+        Summary should sum and count entries of each category
+        """
+        mommy.make(
+            CashEntry,
+            set=self.cash_set,
+            category=self.category,
+            price=Decimal(10),
+            _quantity=3
+        )
+        mommy.make(Category, statement='expense')
+
+        response = self.client.get(self.url, {'year': 2015, 'month': 12})
+        self.assertEqual(response.status_code, http.OK)
+
+        self.assertEqual(response.data['count'], 1)
+        summary = response.data['results'][0]
+        self.assertEqual(summary['id'], self.category.id)
+        self.assertEqual(summary['summary_value'], Decimal(30))
+        self.assertEqual(summary['entries_count'], 3)
+
+    def test_categories_summary_invalidated_by_new_entry(self):
+        """
+        Cached summary should be refreshed when entry in period changes
+        """
+        mommy.make(
+            CashEntry,
+            set=self.cash_set,
+            category=self.category,
+            price=Decimal(10)
+        )
+        self.client.get(self.url, {'year': 2015})
+
+        mommy.make(
+            CashEntry,
+            set=self.cash_set,
+            category=self.category,
+            price=Decimal(5)
+        )
+        response = self.client.get(self.url, {'year': 2015})
+
+        summary = response.data['results'][0]
+        self.assertEqual(summary['summary_value'], Decimal(15))
+        self.assertEqual(summary['entries_count'], 2)
+
+    def test_categories_summary_queries_dont_grow(self):
+        """
+        Summary query count shouldn't depend on number of categories
+        """
+        mommy.make(CashEntry, set=self.cash_set, category=self.category)
+        with CaptureQueriesContext(connection) as few_categories:
+            self.client.get(self.url, {'year': 2015})
+
+        for category in mommy.make(Category, _quantity=5):
+            mommy.make(CashEntry, set=self.cash_set, category=category)
+        with CaptureQueriesContext(connection) as many_categories:
+            self.client.get(self.url, {'year': 2015})
+
+        self.assertEqual(
+            len(few_categories.captured_queries),
+            len(many_categories.captured_queries)
+        )
+
+
+class CashEntryViewSetTestCase(TestCase):
+    """
+    Test Case for cash entries endpoint
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('cash_register_api:entry-list')
+        self.cash_set = mommy.make(DailyCashSet, date=Date(2015, 12, 25))
+        self.cash_entries = mommy.make(
+            CashEntry,
+            set=self.cash_set,
+            created_date=datetime(2015, 12, 25, 12, tzinfo=pytz.utc),
+            _quantity=5
+        )
+        mommy.make(CashEntry, set__date=Date(2014, 1, 1))
+
+        User.objects.create_superuser('admin', '', 'password')
+        self.client.login(username='admin', password='password')
+
+    def test_cursor_pagination(self):
+        """
+        Cursor pages should walk filtered entries without COUNT query
+        """
+        ids = []
+        params = {'cursor': '', 'page_size': 2, 'year': 2015}
+        url = self.url
+
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, http.OK)
+                self.assertNotIn('count', response.data)
+                ids.extend(entry['id'] for entry in response.data['results'])
+                url, params = response.data['next'], None
+
+        self.assertEqual(
+            ids,
+            sorted(cash_entry.id for cash_entry in self.cash_entries)
+        )
+        for query in queries.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+
+    def test_entries_not_modified(self):
+        """
+        Entries list should return not modified until any entry changes
+        """
+        response = self.client.get(self.url, {'year': 2015})
+        etag = response['ETag']
+
+        response = self.client.get(
+            self.url, {'year': 2015}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, http.NOT_MODIFIED)
+
+        self.cash_entries[0].delete()
+        response = self.client.get(
+            self.url, {'year': 2015}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, http.OK)
+
+    def test_invalid_cursor(self):
+        """
+        Broken cursor should return not found
+        """
+        response = self.client.get(self.url, {'cursor': 'broken'})
+        self.assertEqual(response.status_code, http.NOT_FOUND)
+
+    def test_export_csv(self):
+        """
+        CSV export should stream header and every filtered entry
+        """
+        response = self.client.get(
+            reverse('cash_register_api:entry-export'), {'year': 2015}
+        )
+        self.assertEqual(response.status_code, http.OK)
+
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertTrue(lines[0].startswith(b'branch,id,'))
+        self.assertEqual(len(lines), len(self.cash_entries) + 1)
+
+    def test_export_ndjson(self):
+        """
+        NDJSON export should stream one json document per entry
+        """
+        response = self.client.get(
+            reverse('cash_register_api:entry-export'),
+            {'year': 2015, 'output': 'ndjson'}
+        )
+        self.assertEqual(response.status_code, http.OK)
+
+        lines = b''.join(response.streaming_content).splitlines()
+        ids = [json.loads(line.decode('utf-8'))['id'] for line in lines]
+        self.assertEqual(
+            ids,
+            sorted(cash_entry.id for cash_entry in self.cash_entries)
+        )
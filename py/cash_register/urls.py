@@ -9,11 +9,10 @@ from cash_register.views import (
     CashRegisterExpense,
     CashEntryDelete,
     DailyCashSetLock,
-    CashEntryUpdate)
-from reports.cash_reports import (
-    CashRegisterDailyReportPDF,
-    CashRegisterConfirmationPDF,
-)
+    CashEntryUpdate,
+    CashRegisterConfirmationsPDF,
+    CashRegisterDailyReportCachedPDF)
+from reports.cash_reports import CashRegisterConfirmationPDF
 
 
 urlpatterns = [
@@ -22,8 +21,11 @@ urlpatterns = [
     url(r'^confirmation/(?P<entry_id>\d+)/$',
         CashRegisterConfirmationPDF.as_view(), name='pdf_confirmation'
     ),
+    url(r'^(?P<branch_id>\d+)/confirmations/$',
+        CashRegisterConfirmationsPDF.as_view(), name='pdf_confirmations'
+    ),
     url(r'^reports/daily/(?P<cash_set_id>\d+)/$',
-        CashRegisterDailyReportPDF.as_view(), name='pdf_daily_report'
+        CashRegisterDailyReportCachedPDF.as_view(), name='pdf_daily_report'
     ),
     url(r'^(?P<branch_id>\d+)/(?P<year>[0-9]{4})/(?P<month>[1-9]|1[0-2])/(?P<day>[1-9]|[1-2][0-9]|3[0-1])/$',
         CashRegisterIndex.as_view(), name='index',
@@ -3,10 +3,23 @@
 
 from datetime import date
 
+from django.contrib.messages import get_messages
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
-from django.http import HttpResponseForbidden, HttpResponseRedirect, Http404
+from django.db import transaction
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    HttpResponseRedirect,
+    Http404,
+)
+from django.middleware.csrf import get_token
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
 
+from bmsutils.permissions import auth_branch_ids
 from bmsutils.queryset import auth_branches
 from bmsutils.views import (
     ThemedTemplateView,
@@ -15,14 +28,28 @@ from bmsutils.views import (
     ThemedUpdateView,
 )
 
+from cash_register.cache import (
+    PAGE_KEY,
+    PAGE_TIMEOUT,
+    cash_set_name,
+    get_changed,
+)
+from cash_register.conditional import (
+    get_not_modified_response,
+    make_etag,
+    set_conditional_headers,
+)
+from cash_register.confirmations import PdfFileMerger, render_confirmations
 from cash_register.forms import (
     CashEntryUpdateForm,
     IncomeForm,
     ExpenseForm,
 )
 from cash_register.models import CashEntry, DailyCashSet
+from cash_register.pdf_cache import load_daily_report, save_daily_report
 from business.models import Branch
 from invoices.models import Invoice
+from reports.cash_reports import CashRegisterDailyReportPDF
 
 
 class CashRegisterHome(ThemedTemplateView):
@@ -60,7 +87,7 @@ class CashRegisterMixin(object):
                 id=int(invoice_id)
             )
 
-        if self.branch not in auth_branches(self.request.user):
+        if self.branch.id not in auth_branch_ids(self.request.user):
             return HttpResponseForbidden()
 
         try:
@@ -72,22 +99,24 @@ class CashRegisterMixin(object):
         except ValueError:
             raise Http404
 
-        try:
-            self.daily_cash_set = (
-                DailyCashSet.objects.prefetch_related('entries').get(
+        self.earliest_cs, self.latest_cs = (
+            DailyCashSet.get_register_state(self.branch.id)
+        )
+
+        # Cash set can't exist outside of branch register dates
+        has_cash_set = (
+            self.earliest_cs is not None and
+            self.earliest_cs.date <= self.date <= self.latest_cs.date
+        )
+        self.daily_cash_set = None
+        if has_cash_set:
+            try:
+                self.daily_cash_set = DailyCashSet.objects.get(
                     branch=self.branch,
                     date=self.date
                 )
-            )
-        except DailyCashSet.DoesNotExist:
-            self.daily_cash_set = None
-
-        self.latest_cs = (
-            DailyCashSet.objects.filter(branch=self.branch).last()
-        )
-        self.earliest_cs = (
-            DailyCashSet.objects.filter(branch=self.branch).first()
-        )
+            except DailyCashSet.DoesNotExist:
+                pass
 
         return super(CashRegisterMixin, self).dispatch(
             request, *args, **kwargs
@@ -132,6 +161,70 @@ class CashRegisterIndex(CashRegisterMixin, ThemedTemplateView):
     permission_required = 'cash_register.view_cashregister'
     template_name = 'cash_register/index.html'
 
+    def _get_validators(self):
+        """
+        ETag and Last-Modified of the page, built from cached change time
+        of the day set and register state, without fetching any entries
+        """
+        changed = get_changed(cash_set_name(self.branch.id, self.date))
+        etag = make_etag(
+            self.branch.id,
+            self.date,
+            changed,
+            self.daily_cash_set.is_locked if self.daily_cash_set else None,
+            self.earliest_cs,
+            self.latest_cs,
+            self.request.user.id,
+            self.request.user.is_superuser,
+            date.today(),
+        )
+        return etag, changed
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self._get_validators()
+        response = get_not_modified_response(request, etag, last_modified)
+        if response is None:
+            response = self._get_page(request, last_modified, *args, **kwargs)
+        return set_conditional_headers(response, etag, last_modified)
+
+    def _get_page(self, request, changed, *args, **kwargs):
+        """
+        Render page, locked days are rendered once per user session and
+        served from cache with their headers until cash set or any of its
+        entries change. Pages showing flash messages aren't cached.
+        """
+        if (self.daily_cash_set is None or
+                not self.daily_cash_set.is_locked or
+                len(get_messages(request))):
+            return super(CashRegisterIndex, self).get(request, *args, **kwargs)
+
+        # Page contains user name and CSRF token of the session
+        key = PAGE_KEY.format(
+            set_id=self.daily_cash_set.id,
+            user_id=request.user.id,
+            visibility='all' if request.user.is_superuser else 'active',
+            csrf_token=get_token(request),
+            changed=changed,
+            today=date.today(),
+        )
+        page = cache.get(key)
+        if page is not None:
+            content, headers = page
+            response = HttpResponse(content)
+            for header, value in headers:
+                response[header] = value
+            return response
+
+        response = super(CashRegisterIndex, self).get(request, *args, **kwargs)
+        response.render()
+        if response.status_code == 200:
+            cache.set(
+                key,
+                (response.content, list(response.items())),
+                PAGE_TIMEOUT
+            )
+        return response
+
     def get_context_data(self, **kwargs):
         context = super(CashRegisterIndex, self).get_context_data(**kwargs)
         context['today'] = date.today()
@@ -146,14 +239,9 @@ class CashRegisterIndex(CashRegisterMixin, ThemedTemplateView):
         if self.daily_cash_set is None:
             return context
 
-        if self.request.user.is_superuser:
-            obj = CashEntry.all_objects
-        else:
-            obj = CashEntry.objects
-
-        context['entries'] = obj\
-            .select_related('category', 'created_by')\
-            .filter(set=self.daily_cash_set)
+        context['entries'] = self.daily_cash_set.get_entries(
+            with_deleted=self.request.user.is_superuser
+        )
         context['daily_cash_set'] = self.daily_cash_set
 
         return context
@@ -210,7 +298,6 @@ class CashEntryUpdate(CashRegisterMixin, CashRegisterSecureMixin, ThemedUpdateVi
     form_class = CashEntryUpdateForm
     template_name = 'cash_register/form.html'
     cash_entry = None
-    initial_price = None
 
     def dispatch(self, request, *args, **kwargs):
         if not request.user.is_authenticated():
@@ -220,7 +307,6 @@ class CashEntryUpdate(CashRegisterMixin, CashRegisterSecureMixin, ThemedUpdateVi
             CashEntry,
             id=kwargs.get('id', 0)
         )
-        self.initial_price = self.cash_entry.price
 
         is_creator = self.cash_entry.created_by == request.user
         if not is_creator and not request.user.is_superuser:
@@ -241,13 +327,17 @@ class CashEntryUpdate(CashRegisterMixin, CashRegisterSecureMixin, ThemedUpdateVi
     def form_valid(self, form):
         update_fields = ['price', 'person_refer', 'document_refer', 'note']
 
-        cash_entry = form.save(commit=False)
-        cash_entry.save(update_fields=update_fields)
+        with transaction.atomic():
+            cash_entry = form.save(commit=False)
+            # Delta is computed from price of locked row, not the one
+            # loaded before form was validated
+            stored = cash_entry.refresh_for_update()
+            if stored.is_deleted:
+                raise Http404
+            cash_entry.save(update_fields=update_fields)
 
-        if self.cash_entry.price != self.initial_price:
-            cash_entry.set.balance -= self.initial_price
-            cash_entry.set.balance += cash_entry.price
-            cash_entry.set.save(update_fields=['balance'])
+            if cash_entry.price != stored.price:
+                cash_entry.set.apply_delta(cash_entry.price - stored.price)
 
         return HttpResponseRedirect(self.get_success_url())
 
@@ -262,6 +352,93 @@ class DailyCashSetLock(CashRegisterMixin, CashRegisterSecureMixin, ThemedDeleteV
     model = DailyCashSet
 
     def get(self, request, *args, **kwargs):
-        self.obj.lock()
+        self.obj.lock(rendered_by=request.user)
         url = self.get_redirect_url(request, *args, **kwargs)
         return HttpResponseRedirect(url)
+
+
+class CashRegisterDailyReportCachedPDF(CashRegisterDailyReportPDF):
+    """
+    Daily report which is rendered once for locked cash sets and later
+    served from storage
+    """
+
+    def get(self, request, *args, **kwargs):
+        cash_set = get_object_or_404(
+            DailyCashSet, id=int(kwargs['cash_set_id'])
+        )
+        if cash_set.branch_id not in auth_branch_ids(request.user):
+            return HttpResponseForbidden()
+        if not cash_set.is_locked:
+            return super(CashRegisterDailyReportCachedPDF, self).get(
+                request, *args, **kwargs
+            )
+
+        content = load_daily_report(cash_set.id)
+        if content is not None:
+            return HttpResponse(content, content_type='application/pdf')
+
+        response = super(CashRegisterDailyReportCachedPDF, self).get(
+            request, *args, **kwargs
+        )
+        if response.status_code == 200:
+            save_daily_report(cash_set.id, response.content)
+        return response
+
+
+class CashRegisterConfirmationsPDF(ThemedTemplateView):
+    """
+    All KP/KW confirmations of branch for dates range (date_from, date_to)
+    or list of entries (ids) rendered as one multi-page PDF
+    """
+    permission_required = 'cash_register.view_cashregister'
+
+    def get(self, request, *args, **kwargs):
+        branch = get_object_or_404(Branch, id=int(kwargs['branch_id']))
+        if branch.id not in auth_branch_ids(request.user):
+            return HttpResponseForbidden()
+        if PdfFileMerger is None:
+            return HttpResponse(
+                'PyPDF2 is required to merge confirmations',
+                content_type='text/plain',
+                status=503
+            )
+
+        entries = CashEntry.objects.filter(
+            set__branch=branch,
+            confirmation=True
+        ).order_by('created_date', 'id')
+
+        if request.GET.get('ids'):
+            try:
+                ids = [
+                    int(entry_id) for entry_id in request.GET['ids'].split(',')
+                ]
+            except ValueError:
+                return HttpResponseBadRequest()
+            entries = entries.filter(id__in=ids)
+        else:
+            try:
+                date_from = parse_date(request.GET.get('date_from', ''))
+                date_to = parse_date(request.GET.get('date_to', ''))
+            except ValueError:
+                return HttpResponseBadRequest()
+            if date_from is None or date_to is None or date_from > date_to:
+                return HttpResponseBadRequest()
+            entries = entries.filter(
+                set__date__gte=date_from,
+                set__date__lte=date_to
+            )
+
+        entry_ids = list(entries.values_list('id', flat=True))
+        if not entry_ids:
+            raise Http404
+
+        # Merged document is complete only when all pages are rendered,
+        # then it is sent from spooled file and closed afterwards
+        output = render_confirmations(entry_ids, request.user)
+        response = FileResponse(output, content_type='application/pdf')
+        response['Content-Disposition'] = (
+            'inline; filename="confirmations-{}.pdf"'.format(branch.id)
+        )
+        return response
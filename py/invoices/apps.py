@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.apps import AppConfig
+
+
+class InvoicesConfig(AppConfig):
+    name = 'invoices'
+
+    def ready(self):
+        # Registers receivers maintaining search index and summaries cache
+        from invoices import search, summary  # noqa
+        # Registers receivers invalidating cached user branches
+        from bmsutils import permissions  # noqa
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import logging
+
+from django.db import DatabaseError, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.signals import post_save
+from django.utils.translation import ugettext as _
+
+from business.models import Branch, Contractor
+from invoices.models import Category, Invoice, InvoiceItem
+from invoices.rest.serializers import InvoiceBulkSerializer
+
+
+# Payload keys of related objects resolved for the whole batch at once
+RELATED_KEYS = (
+    (Branch, ('branch',)),
+    (Category, ('category',)),
+    (Contractor, ('customerId', 'receiverId')),
+)
+
+# Model of catalog item invoice items may refer to
+ITEM_MODEL = InvoiceItem._meta.get_field('item').related_model
+
+logger = logging.getLogger(__name__)
+
+
+def _get_ids(invoices_data, keys):
+    ids = set()
+    for data in invoices_data:
+        if not isinstance(data, dict):
+            continue
+        for key in keys:
+            value = data.get(key)
+            if str(value).isdigit():
+                ids.add(int(value))
+    return ids
+
+
+def _get_related(invoices_data):
+    """
+    Fetch branches, categories and contractors referred by any invoice
+    and catalog items referred by any of their items, one query per model
+    """
+    related = dict(
+        (model, model.objects.in_bulk(_get_ids(invoices_data, keys)))
+        for model, keys in RELATED_KEYS
+    )
+    items_data = [
+        item
+        for data in invoices_data
+        if isinstance(data, dict) and isinstance(data.get('items'), list)
+        for item in data['items'] if isinstance(item, dict)
+    ]
+    related[ITEM_MODEL] = ITEM_MODEL.objects.in_bulk(
+        _get_ids(items_data, ('item',))
+    )
+    return related
+
+
+def _save_items(invoice, saved_items, items_data):
+    """
+    Diff given items with saved ones: new items are created in one query,
+    changed ones updated in one query and missing ones deleted in one query.
+    Created and updated items are fetched once more to send post_save
+    signals, which bulk operations don't send.
+    """
+    saved_items = dict((item.id, item) for item in saved_items)
+    saved_ids = set(saved_items)
+    new_items, changes = [], {}
+    for data in items_data:
+        item_id = data.pop('id', None)
+        if item_id is None:
+            new_items.append(InvoiceItem(invoice=invoice, **data))
+            continue
+        item = saved_items.pop(item_id)
+        for field, value in data.items():
+            # Relations are compared and written by primary key, so
+            # related objects aren't loaded
+            model_field = InvoiceItem._meta.get_field(field)
+            if model_field.is_relation:
+                current = getattr(item, model_field.attname)
+                value = getattr(value, 'pk', None)
+            else:
+                current = getattr(item, field)
+            if current != value:
+                changes.setdefault(field, {})[item_id] = value
+
+    if saved_items:
+        InvoiceItem.objects.filter(id__in=list(saved_items)).delete()
+    if new_items:
+        InvoiceItem.objects.bulk_create(new_items)
+    if changes:
+        InvoiceItem.objects.filter(id__in=set(
+            item_id for values in changes.values() for item_id in values
+        )).update(**dict(
+            (field, Case(
+                *[
+                    When(id=item_id, then=Value(value))
+                    for item_id, value in values.items()
+                ],
+                default=F(field),
+                output_field=InvoiceItem._meta.get_field(field)
+            ))
+            for field, values in changes.items()
+        ))
+
+    if new_items or changes:
+        unchanged_ids = saved_ids - set(
+            item_id for values in changes.values() for item_id in values
+        )
+        for item in InvoiceItem.objects.filter(invoice=invoice).exclude(
+                id__in=unchanged_ids):
+            post_save.send(
+                sender=InvoiceItem,
+                instance=item,
+                created=item.id not in saved_ids,
+                update_fields=None,
+                raw=False,
+                using=item._state.db,
+            )
+
+
+def _save_invoice(invoice, saved_items, validated_data):
+    items_data = validated_data.pop('items')
+    for field, value in validated_data.items():
+        setattr(invoice, field, value)
+    invoice.save()
+    _save_items(invoice, saved_items, items_data)
+    return invoice
+
+
+def save_invoices(invoices_data, branch_ids=None):
+    """
+    Create invoices without id and update ones with id, together with
+    their items. Every invoice is saved in its own savepoint, so invalid
+    ones don't stop the rest. Returns dicts of saved invoices and of
+    errors, both by invoice index. Only invoices of given branch ids (all when
+    None) can be written.
+    """
+    related = _get_related(invoices_data)
+    existing = Invoice.objects.prefetch_related('items').filter(
+        id__in=_get_ids(invoices_data, ('id',))
+    )
+    if branch_ids is not None:
+        existing = existing.filter(branch_id__in=branch_ids)
+    existing = existing.in_bulk()
+
+    invoices, errors = {}, {}
+    with transaction.atomic():
+        for index, data in enumerate(invoices_data):
+            if not isinstance(data, dict):
+                errors[index] = {
+                    'non_field_errors': [_(u'Oczekiwano obiektu faktury.')]
+                }
+                continue
+
+            serializer = InvoiceBulkSerializer(
+                data=data, context={'related': related}
+            )
+            if not serializer.is_valid():
+                errors[index] = serializer.errors
+                continue
+
+            validated_data = dict(serializer.validated_data)
+            invoice_id = validated_data.pop('id', None)
+            if invoice_id is None:
+                invoice = Invoice()
+            elif invoice_id in existing:
+                invoice = existing[invoice_id]
+            else:
+                errors[index] = {'id': [_(u'Nie znaleziono faktury.')]}
+                continue
+
+            if branch_ids is not None and \
+                    validated_data['branch'].id not in branch_ids:
+                errors[index] = {'branch': [_(u'Brak dostępu do oddziału.')]}
+                continue
+
+            saved_items = list(invoice.items.all()) if invoice.id else []
+            item_ids = [
+                item['id'] for item in validated_data['items'] if 'id' in item
+            ]
+            if len(set(item_ids)) != len(item_ids) or \
+                    set(item_ids) - set(item.id for item in saved_items):
+                errors[index] = {'items': [_(u'Nieznana pozycja faktury.')]}
+                continue
+
+            try:
+                with transaction.atomic():
+                    invoices[index] = _save_invoice(
+                        invoice, saved_items, validated_data
+                    )
+            except DatabaseError:
+                logger.exception('Cannot save invoice %s of batch', index)
+                errors[index] = {
+                    'non_field_errors': [_(u'Nie udało się zapisać faktury.')]
+                }
+    return invoices, errors
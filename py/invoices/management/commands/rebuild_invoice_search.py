@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+
+from invoices.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Index customer data of all invoices in invoices search backend'
+
+    def handle(self, *args, **options):
+        count = get_search_backend().rebuild()
+        self.stdout.write('Indexed {} invoices'.format(count))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import re
+import unicodedata
+
+from django.db import migrations
+
+
+# Full-text index of invoices' customer data, SQLite only
+CREATE_SEARCH_TABLES = [
+    "CREATE VIRTUAL TABLE invoices_invoice_search USING fts5("
+    "customer_name, customer_address, "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE VIRTUAL TABLE invoices_invoice_search_vocabulary "
+    "USING fts5vocab(invoices_invoice_search, 'row')",
+]
+
+DROP_SEARCH_TABLES = [
+    "DROP TABLE invoices_invoice_search_vocabulary",
+    "DROP TABLE invoices_invoice_search",
+]
+
+INSERT_SEARCH_ROWS = (
+    "INSERT INTO invoices_invoice_search "
+    "(rowid, customer_name, customer_address) VALUES (%s, %s, %s)"
+)
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+FOLDED_LETTERS = {ord('ł'): 'l', ord('đ'): 'd', ord('ø'): 'o'}
+
+
+def get_terms(text):
+    """
+    Fold text into indexed terms, as the search backend did when this
+    migration was written
+    """
+    normalized = unicodedata.normalize('NFKD', text.lower())
+    normalized = ''.join(
+        char for char in normalized if not unicodedata.combining(char)
+    )
+    return TERM_RE.findall(normalized.translate(FOLDED_LETTERS))
+
+
+def create_invoice_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in CREATE_SEARCH_TABLES:
+        schema_editor.execute(statement)
+
+    Invoice = apps.get_model('invoices', 'Invoice')
+    rows = Invoice.objects.order_by('id').values_list(
+        'id', 'customer_name', 'customer_address'
+    )
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(INSERT_SEARCH_ROWS, [
+            [row[0]] + [' '.join(get_terms(value or '')) for value in row[1:]]
+            for row in rows.iterator()
+        ])
+
+
+def drop_invoice_search(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_SEARCH_TABLES:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_invoice_search, drop_invoice_search),
+    ]
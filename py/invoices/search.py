@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import difflib
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+from invoices.models import Invoice
+
+
+# Invoice fields covered by the search index
+SEARCH_FIELDS = ('customer_name', 'customer_address')
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+# Letters which unicode decomposition doesn't split into base and accent
+FOLDED_LETTERS = {ord('ł'): 'l', ord('đ'): 'd', ord('ø'): 'o'}
+
+
+def get_terms(text):
+    """
+    Split text into lower case terms without diacritics, both indexed
+    values and queries are folded this way
+    """
+    normalized = unicodedata.normalize('NFKD', text.lower())
+    normalized = ''.join(
+        char for char in normalized if not unicodedata.combining(char)
+    )
+    return TERM_RE.findall(normalized.translate(FOLDED_LETTERS))
+
+
+class ContainsSearchBackend(object):
+    """
+    Search without index, every term has to be contained in any field.
+    Nothing is indexed, so index maintenance does nothing.
+    """
+
+    def index(self, invoice):
+        pass
+
+    def remove(self, invoice_id):
+        pass
+
+    def rebuild(self):
+        return 0
+
+    def filter_queryset(self, queryset, query):
+        for term in query.split():
+            condition = Q()
+            for field in SEARCH_FIELDS:
+                condition |= Q(**{'{}__icontains'.format(field): term})
+            queryset = queryset.filter(condition)
+        return queryset
+
+
+class Fts5SearchBackend(object):
+    """
+    SQLite FTS5 index of invoices, rowid of indexed row is invoice id.
+    Every term is matched as a prefix, terms not found in the index are
+    replaced with similar indexed ones to tolerate typos.
+    """
+    table = 'invoices_invoice_search'
+    vocabulary_table = 'invoices_invoice_search_vocabulary'
+    typo_matches = 3
+    typo_cutoff = 0.75
+    rebuild_chunk_size = 1000
+
+    def _execute(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def _fetchall(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def _insert(self, rows):
+        rows = [
+            [row[0]] + [' '.join(get_terms(value or '')) for value in row[1:]]
+            for row in rows
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO {table} (rowid, {fields}) '
+                'VALUES (%s, {values})'.format(
+                    table=self.table,
+                    fields=', '.join(SEARCH_FIELDS),
+                    values=', '.join(['%s'] * len(SEARCH_FIELDS)),
+                ),
+                rows
+            )
+
+    def index(self, invoice):
+        self.remove(invoice.id)
+        self._insert([
+            [invoice.id] + [getattr(invoice, field) for field in SEARCH_FIELDS]
+        ])
+
+    def remove(self, invoice_id):
+        self._execute(
+            'DELETE FROM {table} WHERE rowid = %s'.format(table=self.table),
+            [invoice_id]
+        )
+
+    def rebuild(self):
+        """
+        Index all invoices from scratch, returns number of indexed ones
+        """
+        self._execute('DELETE FROM {table}'.format(table=self.table))
+        rows = Invoice.objects.order_by('id').values_list(
+            'id', *SEARCH_FIELDS
+        )
+        indexed = 0
+        last_id = 0
+        while True:
+            chunk = list(rows.filter(id__gt=last_id)[:self.rebuild_chunk_size])
+            if not chunk:
+                return indexed
+            self._insert(chunk)
+            indexed += len(chunk)
+            last_id = chunk[-1][0]
+
+    def _has_prefix(self, term):
+        return bool(self._fetchall(
+            'SELECT 1 FROM {vocabulary} WHERE term >= %s AND term < %s '
+            'LIMIT 1'.format(vocabulary=self.vocabulary_table),
+            [term, term + '\U0010ffff']
+        ))
+
+    def _get_similar(self, term):
+        """
+        Indexed terms similar to given one, candidates share its first letter
+        """
+        rows = self._fetchall(
+            'SELECT term FROM {vocabulary} WHERE term >= %s AND term < %s '
+            'AND length(term) BETWEEN %s AND %s'.format(
+                vocabulary=self.vocabulary_table
+            ),
+            [term[0], term[0] + '\U0010ffff', len(term) - 2, len(term) + 2]
+        )
+        return difflib.get_close_matches(
+            term,
+            [row[0] for row in rows],
+            n=self.typo_matches,
+            cutoff=self.typo_cutoff
+        )
+
+    def get_match(self, query):
+        """
+        Build FTS5 match expression of all query terms
+        """
+        expressions = []
+        for term in get_terms(query):
+            alternatives = ['"{}"*'.format(term)]
+            if not self._has_prefix(term):
+                alternatives.extend(
+                    '"{}"'.format(similar) for similar in self._get_similar(term)
+                )
+            expressions.append('({})'.format(' OR '.join(alternatives)))
+        return ' AND '.join(expressions)
+
+    def search(self, query, limit=100):
+        """
+        Return ids of best matching invoices, best match first
+        """
+        match = self.get_match(query)
+        if not match:
+            return []
+        rows = self._fetchall(
+            'SELECT rowid FROM {table} WHERE {table} MATCH %s '
+            'ORDER BY rank LIMIT %s'.format(table=self.table),
+            [match, limit]
+        )
+        return [row[0] for row in rows]
+
+    def filter_queryset(self, queryset, query):
+        match = self.get_match(query)
+        if not match:
+            return queryset
+        return queryset.extra(
+            where=[
+                '{pk} IN (SELECT rowid FROM {table} WHERE {table} MATCH %s)'
+                .format(
+                    pk='{}.{}'.format(
+                        connection.ops.quote_name(queryset.model._meta.db_table),
+                        connection.ops.quote_name(queryset.model._meta.pk.column)
+                    ),
+                    table=self.table,
+                )
+            ],
+            params=[match]
+        )
+
+
+_backend = None
+
+
+def get_search_backend():
+    """
+    Return backend set in INVOICE_SEARCH_BACKEND setting, by default FTS5
+    index on SQLite and plain contains search on other databases
+    """
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'INVOICE_SEARCH_BACKEND', None)
+        if path:
+            _backend = import_string(path)()
+        elif connection.vendor == 'sqlite':
+            _backend = Fts5SearchBackend()
+        else:
+            _backend = ContainsSearchBackend()
+    return _backend
+
+
+class InvoiceSearchFilter(BaseFilterBackend):
+    """
+    Filter invoices with `search` query parameter using search backend
+    """
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return get_search_backend().filter_queryset(queryset, query)
+
+
+@receiver(post_save, sender=Invoice)
+def index_invoice(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=Invoice)
+def remove_invoice(sender, instance, **kwargs):
+    get_search_backend().remove(instance.id)
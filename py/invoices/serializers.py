@@ -4,7 +4,7 @@ from __future__ import unicode_literals
 
 from rest_framework import serializers
 
-from business.models import Contractor
+from business.models import Branch, Contractor
 from invoices.models import Invoice, InvoiceItem, Category
 from orders.rest.serializers import OrderSimpleSerializer
 
@@ -78,3 +78,67 @@ class InvoiceSerializer(serializers.ModelSerializer):
             'receiverId',
             'authorized_to_receive',
         )
+
+
+class BatchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Related field resolved from objects fetched for the whole batch,
+    passed in serializer context as `related` dict of dicts by model
+    """
+
+    def to_internal_value(self, data):
+        related = self.context.get('related', {}).get(self.queryset.model)
+        if related is None:
+            return super(BatchedPrimaryKeyRelatedField, self).to_internal_value(
+                data
+            )
+        try:
+            return related[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class InvoiceItemWriteSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+    item = BatchedPrimaryKeyRelatedField(
+        queryset=InvoiceItem._meta.get_field('item').related_model.objects.all(),
+        allow_null=True,
+        required=False,
+    )
+
+    class Meta:
+        model = InvoiceItem
+        fields = (
+            'id',
+            'item',
+            'name',
+            'measure',
+            'pkwiu',
+            'quantity',
+            'single_price',
+            'value_vat',
+            'vat',
+        )
+
+
+class InvoiceBulkSerializer(InvoiceSerializer):
+    """
+    Invoice with items validated as a part of bulk write, relations are
+    resolved from objects fetched once for the whole batch
+    """
+    id = serializers.IntegerField(required=False)
+    items = InvoiceItemWriteSerializer(many=True)
+    date = serializers.DateField()
+    date_of_sale = serializers.DateField()
+    branch = BatchedPrimaryKeyRelatedField(queryset=Branch.objects.all())
+    category = BatchedPrimaryKeyRelatedField(queryset=Category.objects.all())
+    customerId = BatchedPrimaryKeyRelatedField(
+        queryset=Contractor.objects.all(),
+        source='customer',
+    )
+    receiverId = BatchedPrimaryKeyRelatedField(
+        queryset=Contractor.objects.all(),
+        source='receiver',
+    )
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import unicode_literals
+
+import hashlib
+
+from django.db.models import BooleanField, Case, Count, Sum, Value, When
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from bmsutils.cache import bump_version, get_version
+from invoices.models import Invoice, InvoiceItem
+
+
+SUMMARY_KEY = 'invoices:summary:{version}:{scope}:{params}'
+SUMMARY_TIMEOUT = 60 * 60
+
+# Invoice fields summary is grouped by, with names used in response
+GROUP_FIELDS = (
+    ('branch__shortname', 'branch'),
+    ('category__shortname', 'category'),
+    ('payment_methods', 'payment_methods'),
+    ('is_paid', 'is_paid'),
+)
+
+
+def get_summary_key(branch_ids, params):
+    """
+    Cache key of summary of invoices of given branches (None for all)
+    filtered with given query parameters
+    """
+    scope = 'all' if branch_ids is None else ','.join(
+        str(branch_id) for branch_id in sorted(branch_ids)
+    )
+    params = '&'.join(
+        '{}={}'.format(key, ','.join(sorted(params.getlist(key))))
+        for key in sorted(params)
+    )
+    return SUMMARY_KEY.format(
+        version=get_version('invoices'),
+        scope=hashlib.md5(scope.encode('utf-8')).hexdigest(),
+        params=hashlib.md5(params.encode('utf-8')).hexdigest(),
+    )
+
+
+def get_summary(queryset):
+    """
+    Count invoices and sum their items' gross value by branch, category,
+    payment method and paid state, in one aggregate query
+    """
+    groups = queryset.annotate(
+        is_paid=Case(
+            When(paid__exact='', then=Value(False)),
+            default=Value(True),
+            output_field=BooleanField()
+        )
+    ).values(
+        *[field for field, name in GROUP_FIELDS]
+    ).annotate(
+        invoices_count=Count('id', distinct=True),
+        total_value=Sum('items__value_vat'),
+    ).order_by(*[field for field, name in GROUP_FIELDS])
+
+    invoices = []
+    for group in groups:
+        row = dict((name, group[field]) for field, name in GROUP_FIELDS)
+        row['count'] = group['invoices_count']
+        row['total_value'] = group['total_value'] or 0
+        invoices.append(row)
+
+    return {
+        'count': sum(row['count'] for row in invoices),
+        'total_value': sum(row['total_value'] for row in invoices),
+        'invoices': invoices,
+    }
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_save, sender=InvoiceItem)
+@receiver(post_delete, sender=InvoiceItem)
+def invalidate_summaries(sender, **kwargs):
+    bump_version('invoices')
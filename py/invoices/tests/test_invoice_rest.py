@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import httplib as http
+import json
+import mock
+
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from model_mommy import mommy
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from business.models import Contractor
+from invoices.models import Invoice, InvoiceItem
+from invoices.rest.serializers import InvoiceSerializer
+from invoices.rest.views import InvoiceSummaryView
+
+
+class InvoiceViewSetTestCase(TestCase):
+    """
+    Test Case for invoices endpoint
+    """
+
+    def setUp(self):
+        self.url = reverse('sale_api:invoice-list')
+        User.objects.create_superuser('admin', '', 'password')
+        self.client.login(username='admin', password='password')
+
+    def _make_invoices(self, quantity):
+        for invoice in mommy.make(Invoice, _quantity=quantity):
+            mommy.make(InvoiceItem, invoice=invoice, _quantity=3)
+
+    def _count_list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, http.OK)
+        return len(queries.captured_queries)
+
+    def test_list_uses_list_serializer(self):
+        """
+        List should be serialized with short list serializer
+        """
+        self._make_invoices(1)
+
+        response = self.client.get(self.url)
+        invoice = response.data['results'][0]
+        self.assertIn('url', invoice)
+        self.assertNotIn('items', invoice)
+
+    def test_detail_uses_full_serializer(self):
+        """
+        Single invoice should be serialized with its items
+        """
+        self._make_invoices(1)
+        invoice = Invoice.objects.get()
+
+        response = self.client.get(
+            reverse('sale_api:invoice-detail', args=[invoice.id])
+        )
+        self.assertEqual(response.status_code, http.OK)
+        self.assertEqual(len(response.data['items']), 3)
+
+    def test_list_queries_dont_depend_on_invoices_count(self):
+        """
+        Listing more invoices shouldn't cost more queries
+        """
+        self._make_invoices(2)
+        few_invoices = self._count_list_queries()
+
+        self._make_invoices(8)
+        many_invoices = self._count_list_queries()
+
+        self.assertEqual(few_invoices, many_invoices)
+
+
+class InvoiceSummaryViewTestCase(TestCase):
+    """
+    Test Case for invoices summary endpoint
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser('admin', '', 'password')
+        self.factory = APIRequestFactory()
+
+        self.paid_invoice = mommy.make(Invoice, paid='cash')
+        self.unpaid_invoice = mommy.make(
+            Invoice,
+            paid='',
+            branch=self.paid_invoice.branch,
+            category=self.paid_invoice.category,
+            payment_methods=self.paid_invoice.payment_methods,
+        )
+        for invoice, values in ((self.paid_invoice, (10, 20)),
+                                (self.unpaid_invoice, (5,))):
+            for value in values:
+                mommy.make(InvoiceItem, invoice=invoice, value_vat=Decimal(value))
+
+    def _get(self, params=None):
+        # Summary route is registered by project's sale API urls
+        request = self.factory.get('/summary/', params)
+        force_authenticate(request, user=self.user)
+        return InvoiceSummaryView.as_view()(request)
+
+    def test_summary_groups(self):
+        """
+        Invoices should be counted and summed by paid state
+        """
+        response = self._get()
+        self.assertEqual(response.status_code, http.OK)
+
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['total_value'], Decimal(35))
+        groups = dict(
+            (group['is_paid'], (group['count'], group['total_value']))
+            for group in response.data['invoices']
+        )
+        self.assertEqual(groups, {
+            True: (1, Decimal(30)),
+            False: (1, Decimal(5)),
+        })
+
+    def test_summary_filters(self):
+        """
+        Summary should accept invoices list filters
+        """
+        response = self._get({'is_paid': 'false'})
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['total_value'], Decimal(5))
+
+    def test_summary_invalidated_by_invoice_change(self):
+        """
+        Cached summary should be refreshed when invoice items change
+        """
+        self._get()
+        mommy.make(
+            InvoiceItem, invoice=self.unpaid_invoice, value_vat=Decimal(1)
+        )
+
+        response = self._get()
+        self.assertEqual(response.data['total_value'], Decimal(36))
+
+    def test_summary_is_one_cached_query(self):
+        """
+        Summary should be computed with a single aggregate query and then
+        served from cache
+        """
+        with CaptureQueriesContext(connection) as first_queries:
+            self._get()
+        with CaptureQueriesContext(connection) as second_queries:
+            self._get()
+
+        self.assertEqual(len([
+            query for query in first_queries.captured_queries
+            if 'GROUP BY' in query['sql']
+        ]), 1)
+        self.assertFalse([
+            query for query in second_queries.captured_queries
+            if 'GROUP BY' in query['sql']
+        ])
+
+
+class InvoiceBulkSaveTestCase(TestCase):
+    """
+    Test Case for bulk invoices write endpoint
+    """
+
+    def setUp(self):
+        self.url = reverse('sale_api:invoice-bulk')
+        User.objects.create_superuser('admin', '', 'password')
+        self.client.login(username='admin', password='password')
+
+        self.invoice = mommy.make(Invoice)
+        self.items = mommy.make(
+            InvoiceItem, invoice=self.invoice, item=None, _quantity=2
+        )
+
+    def _get_payload(self, invoice):
+        data = dict(InvoiceSerializer(invoice).data)
+        data['date'] = invoice.date.isoformat()
+        data['date_of_sale'] = invoice.date_of_sale.isoformat()
+        data['items'] = [
+            dict(item, item=saved.item_id, name=saved.name)
+            for item, saved in zip(data['items'], invoice.items.all())
+        ]
+        return data
+
+    def _post(self, payload):
+        return self.client.post(
+            self.url, json.dumps(payload, cls=DjangoJSONEncoder),
+            content_type='application/json'
+        )
+
+    def test_create_invoices(self):
+        """
+        Invoices without id should be created with their items
+        """
+        data = self._get_payload(self.invoice)
+        del data['id']
+        for item in data['items']:
+            del item['id']
+
+        response = self._post([data, dict(data, unique_number='other')])
+        self.assertEqual(response.status_code, http.OK)
+
+        self.assertEqual(len(response.data['saved']), 2)
+        for invoice_id in response.data['saved'].values():
+            self.assertEqual(
+                InvoiceItem.objects.filter(invoice_id=invoice_id).count(), 2
+            )
+
+    def test_update_invoice_items(self):
+        """
+        Changed items should be updated, missing deleted and new created
+        """
+        data = self._get_payload(self.invoice)
+        data['items'][0]['quantity'] = 7
+        new_item = dict(data['items'][1])
+        del new_item['id']
+        data['items'] = [data['items'][0], new_item]
+
+        response = self._post([data])
+        self.assertEqual(response.status_code, http.OK)
+
+        items = InvoiceItem.objects.filter(invoice=self.invoice)
+        self.assertEqual(items.count(), 2)
+        self.assertEqual(items.get(id=self.items[0].id).quantity, 7)
+        self.assertFalse(items.filter(id=self.items[1].id).exists())
+
+    def test_update_item_relation(self):
+        """
+        Catalog item of invoice item should be changed by primary key
+        """
+        item_model = InvoiceItem._meta.get_field('item').related_model
+        catalog_item = mommy.make(item_model)
+        data = self._get_payload(self.invoice)
+        data['items'][0]['item'] = catalog_item.id
+
+        response = self._post([data])
+        self.assertEqual(response.status_code, http.OK)
+
+        self.assertEqual(
+            InvoiceItem.objects.get(id=self.items[0].id).item_id,
+            catalog_item.id
+        )
+        self.assertIsNone(InvoiceItem.objects.get(id=self.items[1].id).item_id)
+
+    def test_non_object_invoice_reported_by_index(self):
+        """
+        Element of batch which isn't an object should be reported as error
+        of its index, others saved
+        """
+        data = self._get_payload(self.invoice)
+
+        response = self._post([1, data])
+        self.assertEqual(response.status_code, http.MULTI_STATUS)
+
+        self.assertIn('non_field_errors', response.data['errors'][0])
+        self.assertEqual(response.data['saved'], {1: self.invoice.id})
+
+    def test_item_signals_sent(self):
+        """
+        Created and updated items should send post_save like saved ones
+        """
+        handler = mock.Mock()
+        post_save.connect(handler, sender=InvoiceItem)
+        self.addCleanup(post_save.disconnect, handler, sender=InvoiceItem)
+
+        data = self._get_payload(self.invoice)
+        data['items'][0]['quantity'] = 7
+        new_item = dict(data['items'][1])
+        del new_item['id']
+        data['items'].append(new_item)
+
+        response = self._post([data])
+        self.assertEqual(response.status_code, http.OK)
+
+        sent = dict(
+            (call[1]['instance'].id, call[1]['created'])
+            for call in handler.call_args_list
+        )
+        self.assertEqual(len(sent), 2)
+        self.assertFalse(sent.pop(self.items[0].id))
+        self.assertEqual(list(sent.values()), [True])
+
+    def test_invalid_invoice_doesnt_stop_batch(self):
+        """
+        Invalid invoice should be reported by index, others saved
+        """
+        data = self._get_payload(self.invoice)
+        data['note'] = 'Changed note'
+        invalid = dict(data, customerId=0)
+
+        response = self._post([invalid, data])
+        self.assertEqual(response.status_code, http.MULTI_STATUS)
+
+        self.assertIn('customerId', response.data['errors'][0])
+        self.assertEqual(response.data['saved'], {1: self.invoice.id})
+        self.assertEqual(
+            Invoice.objects.get(id=self.invoice.id).note, 'Changed note'
+        )
+
+    def test_contractors_resolved_in_one_query(self):
+        """
+        Contractors of all invoices should be fetched with one query
+        """
+        data = self._get_payload(self.invoice)
+        with CaptureQueriesContext(connection) as queries:
+            self._post([data] * 5)
+
+        contractor_table = Contractor._meta.db_table
+        self.assertEqual(len([
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and
+            'FROM "{}"'.format(contractor_table) in query['sql']
+        ]), 1)
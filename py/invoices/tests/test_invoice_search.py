@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from model_mommy import mommy
+
+from invoices.models import Invoice
+from invoices.search import Fts5SearchBackend
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 index needs SQLite')
+class Fts5SearchBackendTestCase(TestCase):
+    """
+    Test Case for SQLite full-text index of invoices' customer data
+    """
+
+    def setUp(self):
+        self.backend = Fts5SearchBackend()
+        self.invoice = mommy.make(
+            Invoice,
+            customer_name=u'Jan Kowalski',
+            customer_address=u'ul. Łódzka 5, Warszawa'
+        )
+        mommy.make(
+            Invoice,
+            customer_name=u'Anna Nowak',
+            customer_address=u'ul. Długa 1, Kraków'
+        )
+
+    def _search(self, query):
+        return list(self.backend.filter_queryset(
+            Invoice.objects.all(), query
+        ).values_list('id', flat=True))
+
+    def test_prefix_search(self):
+        """
+        Beginning of words should be enough to find invoice
+        """
+        self.assertEqual(self._search(u'kowal warsz'), [self.invoice.id])
+
+    def test_search_without_diacritics(self):
+        """
+        Words typed without diacritics should match
+        """
+        self.assertEqual(self._search(u'warszawa lodzka'), [self.invoice.id])
+
+    def test_search_with_typo(self):
+        """
+        Misspelled word should match similar indexed one
+        """
+        self.assertEqual(self._search(u'kowlaski'), [self.invoice.id])
+
+    def test_index_follows_invoice_changes(self):
+        """
+        Saved and deleted invoices should be reflected in the index
+        """
+        self.invoice.customer_name = u'Piotr Zieliński'
+        self.invoice.save()
+        self.assertEqual(self._search(u'kowalski'), [])
+        self.assertEqual(self._search(u'zielinski'), [self.invoice.id])
+
+        self.invoice.delete()
+        self.assertEqual(self._search(u'zielinski'), [])
+
+    def test_rebuild(self):
+        """
+        Rebuilt index should contain all invoices
+        """
+        self.assertEqual(self.backend.rebuild(), 2)
+        self.assertEqual(self.backend.search(u'nowak'), [
+            Invoice.objects.get(customer_name=u'Anna Nowak').id
+        ])
@@ -2,9 +2,18 @@
 
 from __future__ import unicode_literals
 
-from rest_framework import viewsets
+from django.core.cache import cache
+from rest_framework import status, viewsets
+from rest_framework.decorators import list_route
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import SearchFilter
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
+from bmsutils.permissions import auth_branch_ids
+from invoices.bulk import save_invoices
 from invoices.models import Invoice, Category
 from invoices.rest.filters import InvoiceFilter
 from invoices.rest.serializers import (
@@ -12,6 +21,8 @@ from invoices.rest.serializers import (
     InvoiceListSerializer,
     InvoiceSerializer,
 )
+from invoices.search import InvoiceSearchFilter
+from invoices.summary import SUMMARY_TIMEOUT, get_summary, get_summary_key
 
 
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
@@ -25,20 +36,90 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
 
 class InvoiceViewSet(viewsets.ModelViewSet):
     """
-    API endpoint that allows invoices to be viewed.
+    API endpoint that allows invoices to be viewed. List is serialized
+    with short list serializer, other actions with the full one.
     """
     queryset = Invoice.objects.select_related('branch', 'category')
     serializer_class = InvoiceSerializer
     list_serializer_class = InvoiceListSerializer
-    search_fields = ('customer_name', 'customer_address')
+    # Customer data is searched in search index instead of field scans
+    filter_backends = [
+        backend for backend in api_settings.DEFAULT_FILTER_BACKENDS
+        if not issubclass(backend, SearchFilter)
+    ] + [InvoiceSearchFilter]
     filter_class = InvoiceFilter
 
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return self.list_serializer_class
+        return super(InvoiceViewSet, self).get_serializer_class()
+
     def get_queryset(self):
         """
         Invoices are filtered by branches which user has access to and
-        not null no attribute (order drafts)
+        not null no attribute (order drafts). Relations serialized for
+        every invoice are fetched with the page, not per invoice.
         """
         queryset = super(InvoiceViewSet, self).get_queryset()
+        if self.action == 'list':
+            queryset = queryset.select_related(
+                'order', 'customer'
+            ).prefetch_related('items')
+        else:
+            queryset = queryset.select_related(
+                'customer', 'receiver'
+            ).prefetch_related('items')
+
         if self.request.user.is_superuser:
             return queryset
-        return queryset.filter(branch__in=self.request.user.branches.all())
+        return queryset.filter(branch_id__in=auth_branch_ids(self.request.user))
+
+    @list_route(methods=['post'], url_path='bulk')
+    def bulk_save(self, request):
+        """
+        Create invoices without id and update ones with id, with their
+        items. Invalid invoices are reported by their index in the list
+        and don't stop saving the others.
+        """
+        if not isinstance(request.data, list):
+            raise ValidationError('Expected list of invoices')
+
+        branch_ids = None
+        if not request.user.is_superuser:
+            branch_ids = auth_branch_ids(request.user)
+        invoices, errors = save_invoices(request.data, branch_ids)
+        return Response(
+            {
+                'saved': dict(
+                    (index, invoice.id) for index, invoice in invoices.items()
+                ),
+                'errors': errors,
+            },
+            status=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_200_OK
+        )
+
+
+class InvoiceSummaryView(APIView):
+    """
+    API endpoint with invoices count and value grouped by branch, category,
+    payment method and paid state. Accepts the same filters as invoices list.
+    """
+    permission_classes = (IsAuthenticated,)
+    filter_class = InvoiceFilter
+
+    def get(self, request, *args, **kwargs):
+        queryset = Invoice.objects.all()
+        branch_ids = None
+        if not request.user.is_superuser:
+            branch_ids = auth_branch_ids(request.user)
+            queryset = queryset.filter(branch_id__in=branch_ids)
+
+        cache_key = get_summary_key(branch_ids, request.query_params)
+        summary = cache.get(cache_key)
+        if summary is None:
+            queryset = self.filter_class(
+                request.query_params, queryset=queryset
+            ).qs
+            summary = get_summary(queryset)
+            cache.set(cache_key, summary, SUMMARY_TIMEOUT)
+        return Response(summary)